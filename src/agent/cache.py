@@ -1,124 +1,635 @@
+import atexit
+import hashlib
 import json
 import os
+import re
+import threading
+import time
 import numpy as np
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Optional, Dict, List, Any
 from dataclasses import dataclass, field
 from pathlib import Path
 from src.retrieval.embeddings import get_embedding_model
 
+# Optional SIMD-accelerated similarity kernels; fall back to BLAS matmul.
+try:
+    import simsimd
+    _HAS_SIMSIMD = True
+except ImportError:
+    _HAS_SIMSIMD = False
+
+# Opt-in Numba kernel for hosts whose numpy is not linked against a
+# multithreaded BLAS: prange gives an OpenMP-style parallel scan instead.
+_USE_NUMBA = False
+if os.getenv("SEMANTIC_CACHE_NUMBA") == "1":
+    try:
+        from numba import njit, prange
+        _USE_NUMBA = True
+    except ImportError:
+        _USE_NUMBA = False
+
+if _USE_NUMBA:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _cosine_scan(matrix, q):
+        n, d = matrix.shape
+        out = np.empty(n, dtype=np.float32)
+        for i in prange(n):
+            s = np.float32(0.0)
+            for j in range(d):
+                s += matrix[i, j] * q[j]
+            out[i] = s
+        return out
+
+# Optional C JSON codec for the metadata lines; fall back to stdlib json.
+try:
+    import orjson
+    _HAS_ORJSON = True
+except ImportError:
+    _HAS_ORJSON = False
+
+
+def _dumps_line(obj: Dict) -> bytes:
+    if _HAS_ORJSON:
+        return orjson.dumps(obj) + b"\n"
+    return (json.dumps(obj) + "\n").encode("utf-8")
+
+
+def _loads_line(line: bytes) -> Dict:
+    if _HAS_ORJSON:
+        return orjson.loads(line)
+    return json.loads(line)
+
+
+def _normalize_query(query: str) -> str:
+    """Canonical form for exact-match lookups (casefold, collapse spaces)."""
+    return " ".join(query.lower().split())
+
+
+_TABLE_PATTERN = re.compile(r"(?:from|join)\s+([a-z_][\w.]*)", re.IGNORECASE)
+
+# Maps question vocabulary to the dimension table it implies, mirroring
+# the keyword routing in AgentRuntime._get_fallback_sql.
+_INTENT_KEYWORDS = {
+    "product": "dim_product",
+    "category": "dim_product",
+    "brand": "dim_product",
+    "store": "dim_store",
+    "region": "dim_store",
+    "country": "dim_store",
+    "month": "dim_date",
+    "quarter": "dim_date",
+    "date": "dim_date",
+    "year": "dim_date",
+}
+
+
+def _sql_tables(sql: str) -> List[str]:
+    """Table names referenced by a SQL query (FROM/JOIN targets)."""
+    return sorted({name.lower() for name in _TABLE_PATTERN.findall(sql or "")})
+
+
+def _query_intent(query: str) -> set:
+    """Dimension tables a question's wording implies."""
+    text = query.lower()
+    return {table for keyword, table in _INTENT_KEYWORDS.items() if keyword in text}
+
+
+def _embedding_hash(vec: np.ndarray) -> bytes:
+    """Content address for a unit vector: hash of its int8 quantization.
+
+    Quantizing before hashing makes near-identical embeddings (paraphrases
+    that land within quantization epsilon) collapse onto the same table row.
+    """
+    quantized = np.round(np.asarray(vec, dtype=np.float32) * 127).astype(np.int8)
+    return hashlib.blake2b(quantized.tobytes(), digest_size=16).digest()
+
+
 @dataclass
 class CacheEntry:
     query: str
     sql_query: str
     sql_result: Dict[str, Any]
     answer: str
-    embedding: List[float]
+    embedding_idx: int  # row in the shared embedding table
     timestamp: float
+    last_used: float = 0.0  # touched on every hit, drives LRU eviction
+    tables: List[str] = field(default_factory=list)  # intent signature
+    # Document ids retrieval returned when the answer was generated; lets
+    # callers verify a semantic hit against fresh retrieval evidence
+    retrieval_sig: List[str] = field(default_factory=list)
 
 class SemanticCache:
     """
     Semantic Cache for Agentic Analytics.
     Stores {embedding, query, response} to avoid re-generating SQL for similar queries.
     """
-    def __init__(self, persistence_path: str = "config/semantic_cache.json"):
+
+    # Above this many table rows the exhaustive scan is replaced by an
+    # IVF-PQ approximate index (sub-linear search, compressed vectors).
+    IVF_THRESHOLD = 10000
+
+    # Half-precision storage halves RAM, disk, and memory bandwidth for
+    # the similarity scan; fp16 keeps ~3 decimal digits, well inside the
+    # resolution the 0.95 hit threshold needs.
+    EMBEDDING_DTYPE = np.float16
+
+    def __init__(
+        self,
+        persistence_path: str = "config/semantic_cache.jsonl",
+        max_entries: int = 10000,
+        ttl_seconds: Optional[float] = None,
+    ):
         self.persistence_path = persistence_path
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        # Embeddings live in a sibling raw binary file so a store is an
+        # O(1) append instead of an O(N) JSON rewrite.
+        self.embeddings_path = str(Path(persistence_path).with_suffix(".bin"))
         self._entries: List[CacheEntry] = []
         self._embedding_model = get_embedding_model()
-        self._threshold = 0.95
+        # Two-tier acceptance: scores >= _high_threshold hit outright;
+        # scores in [_threshold, _high_threshold) must also agree with the
+        # entry's intent signature, since paraphrases of different intents
+        # can score deceptively high on cosine alone.
+        self._threshold = 0.90
+        self._high_threshold = 0.98
+        # Content-addressed table of unique unit vectors. Entries reference
+        # rows by index, so near-duplicate queries share one row and the
+        # similarity scan runs over unique vectors only.
+        self._table: Optional[np.ndarray] = None
+        self._table_scan: Optional[np.ndarray] = None  # float32 copy (Numba mode)
+        self._pending_rows: List[np.ndarray] = []  # appended since last stack
+        self._emb_hash2idx: Dict[bytes, int] = {}
+        # Row index -> most recent entry index using that row
+        self._row2entry: Dict[int, int] = {}
+        # Normalized query text -> entry index, for O(1) exact hits that
+        # skip the embedding model entirely.
+        self._exact: Dict[str, int] = {}
+        self._index = None  # FAISS index
+        self._use_faiss = False
+        # One lock covers every read/mutate of the in-memory structures:
+        # arun() puts concurrent run() calls on worker threads, and a
+        # store() rebuilding the table must not race a lookup() scanning
+        # it. Embedding forward passes stay outside the lock; the scan is
+        # the only hot section.
+        self._lock = threading.Lock()
+        # Single writer thread keeps stores off the disk's critical path
+        # while preserving append order.
+        self._io_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="semantic-cache-io"
+        )
+        self._pending_write: Optional[Future] = None
+        atexit.register(self.flush)
+        self._try_load_faiss()
         self._load()
 
+    def _try_load_faiss(self):
+        """Try to load FAISS, fall back to numpy if not available."""
+        try:
+            import faiss
+            self._use_faiss = True
+        except ImportError:
+            self._use_faiss = False
+
     def lookup(self, query: str) -> Optional[Dict]:
         """
         Look for a semantically similar query in the cache.
         Returns the cached AgentResponse dict data if found.
         """
-        if not self._entries:
-            return None
-        
-        # Embed current query
-        query_vec = self._embedding_model.embed_single(query)
-        
-        # Calculate cosine similarity with all entries
-        # Optimized: usage matrix multiplication if possible, but loop is fine for <1000 items
-        best_score = -1.0
-        best_entry = None
-        
-        query_norm = query_vec / np.linalg.norm(query_vec)
-        
-        for entry in self._entries:
-            entry_vec = np.array(entry.embedding)
-            entry_norm = entry_vec / np.linalg.norm(entry_vec)
-            score = np.dot(query_norm, entry_norm)
-            
-            if score > best_score:
-                best_score = score
-                best_entry = entry
-                
-        if best_entry and best_score >= self._threshold:
-            print(f"⚡ Cache Hit! Query: '{query}' ~= '{best_entry.query}' (Score: {best_score:.4f})")
-            return {
-                "query": query,
-                "answer": best_entry.answer,
-                "sql_query": best_entry.sql_query,
-                "sql_result": best_entry.sql_result,
-                "is_cached": True,
-                "similarity_score": float(best_score)
-            }
-            
-        return None
-
-    def store(self, query: str, sql_query: str, sql_result: Dict, answer: str) -> None:
+        # Exact-text shortcut: identical (modulo case/whitespace) queries
+        # are resolved from a dict without touching the embedding model.
+        with self._lock:
+            exact_idx = self._exact.get(_normalize_query(query))
+            if exact_idx is not None:
+                entry = self._entries[exact_idx]
+                if not self._is_expired(entry):
+                    entry.last_used = time.time()
+                    print(f"⚡ Cache Hit! Query: '{query}' == '{entry.query}' (Exact)")
+                    return self._hit_dict(query, entry, 1.0)
+
+        hit, _ = self._lookup_with_embedding(query)
+        return hit
+
+    def lookup_with_embedding(self, query: str) -> tuple:
+        """
+        Lookup that hands back (hit, normalized query embedding) so callers
+        on the miss path can reuse the embedding for retrieval instead of
+        running the encoder a second time. The embedding is None when the
+        exact-text shortcut answered without embedding anything.
+        """
+        with self._lock:
+            exact_idx = self._exact.get(_normalize_query(query))
+            if exact_idx is not None:
+                entry = self._entries[exact_idx]
+                if not self._is_expired(entry):
+                    entry.last_used = time.time()
+                    print(f"⚡ Cache Hit! Query: '{query}' == '{entry.query}' (Exact)")
+                    return self._hit_dict(query, entry, 1.0), None
+
+        return self._lookup_with_embedding(query)
+
+    def _lookup_with_embedding(self, query: str) -> tuple:
+        """
+        Lookup that also returns the normalized query embedding, so store()
+        can reuse it instead of running a second embedding forward pass.
+        """
+        # Embed current query (outside the lock; the encoder is the slow
+        # part and touches no cache state)
+        query_norm = self._embedding_model.embed_single(query).astype(np.float32)
+        query_norm /= np.linalg.norm(query_norm)
+
+        with self._lock:
+            if not self._entries:
+                return None, query_norm
+
+            best_row, best_score = self._search_best(query_norm)
+            entry_idx = self._row2entry.get(best_row)
+            if entry_idx is None:
+                return None, query_norm
+            best_entry = self._entries[entry_idx]
+
+            if best_score >= self._threshold and not self._is_expired(best_entry):
+                if best_score >= self._high_threshold or self._intent_matches(
+                    query, best_entry
+                ):
+                    best_entry.last_used = time.time()
+                    print(f"⚡ Cache Hit! Query: '{query}' ~= '{best_entry.query}' (Score: {best_score:.4f})")
+                    return self._hit_dict(query, best_entry, best_score), query_norm
+
+        return None, query_norm
+
+    @staticmethod
+    def _intent_matches(query: str, entry: CacheEntry) -> bool:
+        """
+        Mid-confidence verification: the dimension tables the question's
+        wording implies must be exactly the ones the cached SQL touches.
+        """
+        entry_dims = {t for t in entry.tables if t.startswith("dim_")}
+        return _query_intent(query) == entry_dims
+
+    def _is_expired(self, entry: CacheEntry) -> bool:
+        """Check whether an entry has outlived the configured TTL."""
+        if self._ttl_seconds is None:
+            return False
+        return (time.time() - entry.timestamp) > self._ttl_seconds
+
+    def _hit_dict(self, query: str, entry: CacheEntry, score: float) -> Dict:
+        """Build the cached-response payload for a hit."""
+        return {
+            "query": query,
+            "answer": entry.answer,
+            "sql_query": entry.sql_query,
+            "sql_result": entry.sql_result,
+            "is_cached": True,
+            "similarity_score": float(score),
+            "retrieval_sig": entry.retrieval_sig
+        }
+
+    def store(self, query: str, sql_query: str, sql_result: Dict, answer: str,
+              retrieval_sig: Optional[List[str]] = None) -> None:
         """Store a successful query result."""
-        import time
-        
-        # Verify it's not already covered
-        if self.lookup(query):
+        # Exact duplicate: nothing to do, and no embedding call needed
+        with self._lock:
+            if self._has_live_duplicate(_normalize_query(query)):
+                return
+
+        # Verify it's not already covered, reusing the embedding computed
+        # during the check (already unit-normalized).
+        hit, embedding = self._lookup_with_embedding(query)
+        if hit:
             return
 
-        embedding = self._embedding_model.embed_single(query)
-        
-        entry = CacheEntry(
-            query=query,
-            sql_query=sql_query,
-            sql_result=sql_result,
-            answer=answer,
-            embedding=embedding.tolist(),
-            timestamp=time.time()
-        )
-        self._entries.append(entry)
-        self._save()
+        # Quantize the unit vector to the compact storage dtype
+        embedding = embedding.astype(self.EMBEDDING_DTYPE)
+
+        with self._lock:
+            # Re-check under the lock: another thread may have stored the
+            # same query between the miss above and here
+            if self._has_live_duplicate(_normalize_query(query)):
+                return
+
+            # Stay within the configured bound before inserting
+            while len(self._entries) >= self._max_entries:
+                self._evict_lru()
+
+            row_idx, is_new_row = self._intern_embedding(embedding)
+
+            now = time.time()
+            entry = CacheEntry(
+                query=query,
+                sql_query=sql_query,
+                sql_result=sql_result,
+                answer=answer,
+                embedding_idx=row_idx,
+                timestamp=now,
+                last_used=now,
+                tables=_sql_tables(sql_query),
+                retrieval_sig=sorted(retrieval_sig) if retrieval_sig else []
+            )
+            self._entries.append(entry)
+            entry_idx = len(self._entries) - 1
+            self._exact[_normalize_query(query)] = entry_idx
+            self._row2entry[row_idx] = entry_idx
+            self._append(entry, embedding if is_new_row else None)
         print(f"💾 Cached new query: '{query}'")
 
-    def _save(self):
-        """Persist cache to disk."""
-        data = [
-            {
-                "query": e.query,
-                "sql_query": e.sql_query,
-                "sql_result": e.sql_result,
-                "answer": e.answer,
-                "embedding": e.embedding,
-                "timestamp": e.timestamp
-            }
-            for e in self._entries
-        ]
+    def _has_live_duplicate(self, norm_query: str) -> bool:
+        """
+        Duplicate guard for store(): True when a live entry already covers
+        the query. An expired entry is purged here instead of blocking —
+        expiry is otherwise only swept at load, so without this a query
+        whose entry lapsed could never be re-cached.
+        """
+        entry_idx = self._exact.get(norm_query)
+        if entry_idx is None:
+            return False
+        if not self._is_expired(self._entries[entry_idx]):
+            return True
+        self._entries.pop(entry_idx)
+        self._reintern_all()
+        self._rebuild_index()
+        self._rewrite_all()
+        return False
+
+    def _intern_embedding(self, embedding: np.ndarray) -> tuple:
+        """
+        Dedup an embedding into the shared table.
+        Returns (row_idx, is_new_row); a hash collision on the quantized
+        vector means an existing row is reused instead of stored twice.
+        """
+        key = _embedding_hash(embedding)
+        existing = self._emb_hash2idx.get(key)
+        if existing is not None:
+            return existing, False
+
+        row_idx = self._num_rows()
+        self._pending_rows.append(embedding)
+        self._emb_hash2idx[key] = row_idx
+        if self._use_faiss:
+            self._add_to_index(embedding)
+        return row_idx, True
+
+    def _num_rows(self) -> int:
+        base = 0 if self._table is None else self._table.shape[0]
+        return base + len(self._pending_rows)
+
+    def _row_vector(self, row_idx: int) -> np.ndarray:
+        base = 0 if self._table is None else self._table.shape[0]
+        if row_idx < base:
+            return self._table[row_idx]
+        return self._pending_rows[row_idx - base]
+
+    def _search_best(self, query_norm: np.ndarray) -> tuple:
+        """
+        Find the row index and score of the nearest unique embedding.
+        Prefers the FAISS index (single search call, sub-linear once the
+        table outgrows IVF_THRESHOLD); falls back to the exhaustive scan.
+        """
+        if self._index is not None and self._index.ntotal > 0:
+            scores, ids = self._index.search(query_norm[None, :], 1)
+            return int(ids[0, 0]), float(scores[0, 0])
+
+        scores = self._score_all(query_norm)
+        best_row = int(scores.argmax())
+        return best_row, float(scores[best_row])
+
+    def _add_to_index(self, embedding: np.ndarray) -> None:
+        """Add one normalized row to the FAISS index (if FAISS is available)."""
+        if not self._use_faiss:
+            return
+        import faiss
+        if self._index is None:
+            self._index = self._new_flat_index(embedding.shape[0])
+        self._index.add(np.ascontiguousarray(embedding[None, :], dtype=np.float32))
+        if (
+            not isinstance(self._index, faiss.IndexIVFPQ)
+            and self._index.ntotal > self.IVF_THRESHOLD
+        ):
+            self._rebuild_index()
+
+    @staticmethod
+    def _new_flat_index(dim: int):
+        """Exact index with fp16-compressed storage (inner product on unit
+        vectors == cosine similarity)."""
+        import faiss
+        return faiss.IndexScalarQuantizer(
+            dim, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_INNER_PRODUCT
+        )
+
+    def _rebuild_index(self) -> None:
+        """Rebuild the FAISS index from the current embedding table."""
+        self._ensure_table()
+        if not self._use_faiss or self._table is None:
+            self._index = None
+            return
+        import faiss
+        n, dim = self._table.shape
+        table = np.ascontiguousarray(self._table, dtype=np.float32)
+        if n > self.IVF_THRESHOLD and dim % 16 == 0:
+            # Partitioned + product-quantized index for large caches.
+            # The metric must be passed explicitly: IndexIVFPQ defaults
+            # to L2 regardless of the quantizer's metric, and an L2
+            # distance compared against the cosine thresholds would turn
+            # every lookup into a miss (a perfect match scores 0.0).
+            quantizer = faiss.IndexFlatIP(dim)
+            index = faiss.IndexIVFPQ(
+                quantizer, dim, int(np.sqrt(n)), 16, 8,
+                faiss.METRIC_INNER_PRODUCT
+            )
+            index.train(table)
+            index.add(table)
+            index.nprobe = 8
+        else:
+            index = self._new_flat_index(dim)
+            index.add(table)
+        self._index = index
+
+    def _score_all(self, query_norm: np.ndarray) -> np.ndarray:
+        """
+        Cosine similarity of the query against every unique cached row.
+        Uses SimSIMD's hand-tuned SIMD kernels when installed; otherwise
+        one matrix-vector product against pre-normalized rows replaces
+        the per-entry Python loop (N dot products in a single BLAS call).
+        """
+        self._ensure_table()
+        if _USE_NUMBA:
+            # Numba's CPU target cannot loop over fp16, so the opt-in
+            # kernel scans a lazily-built float32 copy of the table.
+            if self._table_scan is None:
+                self._table_scan = self._table.astype(np.float32)
+            return _cosine_scan(self._table_scan, query_norm)
+        q = query_norm.astype(self._table.dtype)
+        if _HAS_SIMSIMD:
+            distances = np.asarray(
+                simsimd.cdist(q[None, :], self._table, metric="cosine")
+            ).ravel()
+            return 1.0 - distances
+        # Return the matmul result as-is: argmax and the threshold compare
+        # work on fp16 directly, so no converted copy is needed
+        return self._table @ q
+
+    def _ensure_table(self) -> None:
+        """
+        Fold rows appended since the last scan into the contiguous table.
+        Stores queue their row instead of copying the table with vstack on
+        every insert; the one np.vstack here is amortized across however
+        many stores happened since the last scan.
+        """
+        if not self._pending_rows:
+            return
+        if self._table is None:
+            self._table = np.stack(self._pending_rows)
+        else:
+            self._table = np.vstack([self._table, np.stack(self._pending_rows)])
+        self._pending_rows = []
+        self._table_scan = None
+
+    def _evict_lru(self) -> None:
+        """Drop the least-recently-used entry and compact derived state."""
+        if not self._entries:
+            return
+        idx = min(range(len(self._entries)), key=lambda i: self._entries[i].last_used)
+        evicted = self._entries.pop(idx)
+        self._reintern_all()
+        self._rebuild_index()
+        self._rewrite_all()
+        print(f"♻️ Evicted LRU cache entry: '{evicted.query}'")
+
+    def _reintern_all(self) -> None:
+        """Rebuild the embedding table and all derived maps from entries."""
+        vectors = [self._row_vector(e.embedding_idx) for e in self._entries]
+        self._table = None
+        self._table_scan = None
+        self._pending_rows = []
+        self._emb_hash2idx = {}
+        self._row2entry = {}
+        self._exact = {}
+        for entry_idx, (entry, vec) in enumerate(zip(self._entries, vectors)):
+            key = _embedding_hash(vec)
+            row_idx = self._emb_hash2idx.get(key)
+            if row_idx is None:
+                row_idx = len(self._pending_rows)
+                self._pending_rows.append(np.asarray(vec))
+                self._emb_hash2idx[key] = row_idx
+            entry.embedding_idx = row_idx
+            self._row2entry[row_idx] = entry_idx
+            self._exact[_normalize_query(entry.query)] = entry_idx
+        self._ensure_table()
+
+    @staticmethod
+    def _entry_meta(entry: CacheEntry) -> Dict:
+        return {
+            "query": entry.query,
+            "sql_query": entry.sql_query,
+            "sql_result": entry.sql_result,
+            "answer": entry.answer,
+            "embedding_idx": entry.embedding_idx,
+            "timestamp": entry.timestamp,
+            "last_used": entry.last_used,
+            "tables": entry.tables,
+            "retrieval_sig": entry.retrieval_sig
+        }
+
+    def _append(self, entry: CacheEntry, new_row: Optional[np.ndarray]) -> None:
+        """Queue one new entry for persistence (metadata line + raw bytes).
+
+        new_row is None when the entry reuses an existing table row, in
+        which case only the metadata line is written.
+        """
+        # Serialize on the caller's thread so the writer never reads
+        # mutable cache state.
+        line = _dumps_line(self._entry_meta(entry))
+        blob = new_row.tobytes() if new_row is not None else b""
+        self._submit_write(self._write_append, line, blob)
+
+    def _rewrite_all(self) -> None:
+        """Queue a full rewrite of both files (eviction/expiry only)."""
+        lines = b"".join(_dumps_line(self._entry_meta(e)) for e in self._entries)
+        # Copy rows out before truncating: the table may still be a view
+        # into the mmap of the very file being rewritten.
+        self._ensure_table()
+        blobs = self._table.tobytes() if self._table is not None else b""
+        self._submit_write(self._write_replace, lines, blobs)
+
+    def _submit_write(self, fn, *args) -> None:
+        self._pending_write = self._io_executor.submit(fn, *args)
+
+    def _write_append(self, line: bytes, blob: bytes) -> None:
         Path(self.persistence_path).parent.mkdir(exist_ok=True)
-        with open(self.persistence_path, "w") as f:
-            json.dump(data, f)
+        with open(self.persistence_path, "ab") as f:
+            f.write(line)
+        if blob:
+            with open(self.embeddings_path, "ab") as f:
+                f.write(blob)
+
+    def _write_replace(self, lines: bytes, blobs: bytes) -> None:
+        Path(self.persistence_path).parent.mkdir(exist_ok=True)
+        with open(self.persistence_path, "wb") as f:
+            f.write(lines)
+        with open(self.embeddings_path, "wb") as f:
+            f.write(blobs)
+
+    def flush(self) -> None:
+        """Block until every queued persistence write has hit disk."""
+        # The writer is a single ordered worker, so waiting on the most
+        # recently submitted future drains the whole queue.
+        pending = self._pending_write
+        if pending is not None:
+            pending.result()
 
     def _load(self):
-        """Load cache from disk."""
+        """Load cache from disk (JSONL metadata + mmapped embedding table)."""
         if not os.path.exists(self.persistence_path):
             return
-            
+
         try:
-            with open(self.persistence_path, "r") as f:
-                data = json.load(f)
-                self._entries = [
-                    CacheEntry(**item) for item in data
-                ]
+            with open(self.persistence_path, "rb") as f:
+                meta = [_loads_line(line) for line in f if line.strip()]
+
+            if meta:
+                entries = [CacheEntry(**item) for item in meta]
+                num_rows = max(e.embedding_idx for e in entries) + 1
+                # Rows were normalized before being written, so the mmap is
+                # usable directly as the similarity table (no Python float
+                # allocations, no copies). Map it before publishing any
+                # state: _append writes the metadata line and the row blob
+                # as two separate appends, so an unclean shutdown can leave
+                # the .bin file missing or short. If the mmap (or reshape)
+                # fails, no entries were assigned and the cache starts
+                # empty instead of poisoning every later scan.
+                self._table = np.memmap(
+                    self.embeddings_path, dtype=self.EMBEDDING_DTYPE, mode="r"
+                ).reshape(num_rows, -1)
+                self._entries = entries
+                # Drop entries that expired while we were not running
+                if self._ttl_seconds is not None:
+                    kept = [e for e in self._entries if not self._is_expired(e)]
+                    if len(kept) < len(self._entries):
+                        self._entries = kept
+                        self._reintern_all()
+                        self._rewrite_all()
+                if self._entries and not self._emb_hash2idx:
+                    for row_idx in range(self._table.shape[0]):
+                        self._emb_hash2idx[
+                            _embedding_hash(self._table[row_idx])
+                        ] = row_idx
+                    for entry_idx, entry in enumerate(self._entries):
+                        self._row2entry[entry.embedding_idx] = entry_idx
+                        self._exact[_normalize_query(entry.query)] = entry_idx
+            self._rebuild_index()
             print(f"Loaded {len(self._entries)} cached queries.")
         except Exception as e:
+            # Discard anything half-built so a corrupt persistence file
+            # degrades to an empty cache rather than a broken one.
+            self._entries = []
+            self._exact = {}
+            self._emb_hash2idx = {}
+            self._row2entry = {}
+            self._table = None
+            self._table_scan = None
+            self._pending_rows = []
+            self._index = None
             print(f"Failed to load cache: {e}")
 
 # Singleton
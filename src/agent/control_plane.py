@@ -6,22 +6,101 @@ agent registry, and permissions with full observability integration.
 "AI that cannot be governed or explained cannot be operated."
 """
 
+import copy
+import itertools
 import json
+import queue
+import re
+import threading
 import time
-from dataclasses import dataclass, field
+from collections import OrderedDict, defaultdict, deque
+from dataclasses import dataclass, field, asdict
 from datetime import datetime, timezone
 from typing import Dict, List, Optional, Set, Any, Callable
 from pathlib import Path
 from enum import Enum
 from threading import Lock
 
-from src.utils.helpers import timestamp_now, generate_trace_id, ErrorCategory, PlatformError
+from src.utils.helpers import timestamp_now, generate_trace_id, ErrorCategory, PlatformError, RWLock
 from src.utils.config import get_settings
 from src.observability.tracing import get_tracer, TraceEventType
 import numpy as np
 from src.retrieval.embeddings import get_embedding_model
 
 
+# ---------------------------------------------------------------------------
+# Background tracer dispatch
+# Policy checks run on every request and the kill switch fans events out to
+# all active traces; neither should block the caller on observability work.
+# Events are enqueued here and drained by a single daemon thread; on
+# overflow new events are dropped rather than stalling the request path.
+# ---------------------------------------------------------------------------
+
+_trace_queue: queue.Queue = queue.Queue(maxsize=10_000)
+_trace_worker_lock = Lock()
+_trace_worker_started = False
+
+
+def _trace_worker() -> None:
+    while True:
+        trace_id, event_type, action, success, error_message, metadata = _trace_queue.get()
+        try:
+            tracer = get_tracer()
+            # trace_id=None means broadcast to every active trace
+            targets = [trace_id] if trace_id else tracer.list_active_traces()
+            for target in targets:
+                tracer.add_event(
+                    trace_id=target,
+                    event_type=event_type,
+                    action=action,
+                    success=success,
+                    error_message=error_message,
+                    metadata=metadata
+                )
+        except Exception:
+            pass  # Don't fail if tracer unavailable
+
+
+def _dispatch_trace_event(trace_id: Optional[str], event_type, action: str,
+                          success: bool = True, error_message: Optional[str] = None,
+                          metadata: Optional[Dict] = None) -> None:
+    """Enqueue a trace event for background delivery (non-blocking)."""
+    global _trace_worker_started
+    if not _trace_worker_started:
+        with _trace_worker_lock:
+            if not _trace_worker_started:
+                threading.Thread(target=_trace_worker, daemon=True,
+                                 name="control-plane-tracer").start()
+                _trace_worker_started = True
+    try:
+        _trace_queue.put_nowait((trace_id, event_type, action, success, error_message, metadata))
+    except queue.Full:
+        pass  # Shed observability load rather than block the request
+
+
+# Default policy values, hoisted to immutable module-level tuples so each
+# PolicyConfig() only pays for a shallow list() copy instead of rebuilding
+# the literals
+_DEFAULT_ALLOWED_TOOLS = ("sql_query", "metadata_lookup", "semantic_search", "calculate")
+_DEFAULT_BLOCKED_PATTERNS = ("DROP", "DELETE", "TRUNCATE", "ALTER", "INSERT", "UPDATE")
+_DEFAULT_BLOCKED_TOPICS = (
+    "Political discussions, elections, democrats, republicans, government policy",
+    "Religious debates, theology, god, atheism",
+    "Hate speech, racism, sexism, discrimination, slurs",
+    "Medical advice, diagnosis, prescription, treatment",
+    "Legal advice, lawsuit, court case, contract interpretation",
+    "Violence, killing, physical harm, weapons, attack, death threats",
+    "Self-harm, suicide, depression, hurting oneself",
+    "Sexual content, pornography, explicit material"
+)
+
+# Fast-path guardrail keywords (derived from the default blocked topics),
+# compiled once so validate_content scans long prompts in a single pass
+# without allocating a lowercased copy
+_SIMPLE_KEYWORDS = ("politics", "religion", "hate", "violence", "suicide", "sex")
+_SIMPLE_KEYWORD_RE = re.compile("|".join(_SIMPLE_KEYWORDS), re.IGNORECASE)
+
+
 class AgentStatus(Enum):
     """Status of an agent in the registry."""
     IDLE = "idle"
@@ -49,32 +128,18 @@ class PolicyConfig:
     max_loops_per_request: int = 10
     max_retries: int = 3
     timeout_seconds: int = 60
-    allowed_tools: List[str] = field(default_factory=lambda: [
-        "sql_query", "metadata_lookup", "semantic_search", "calculate"
-    ])
+    allowed_tools: List[str] = field(default_factory=lambda: list(_DEFAULT_ALLOWED_TOOLS))
     blocked_tools: List[str] = field(default_factory=list)
-    blocked_query_patterns: List[str] = field(default_factory=lambda: [
-        "DROP", "DELETE", "TRUNCATE", "ALTER", "INSERT", "UPDATE"
-    ])
+    blocked_query_patterns: List[str] = field(default_factory=lambda: list(_DEFAULT_BLOCKED_PATTERNS))
     require_approval_for: List[str] = field(default_factory=list)
     rate_limit_requests_per_minute: int = 60
     enable_cost_limits: bool = True
     max_cost_per_request_usd: float = 0.10
     max_cost_per_day_usd: float = 10.00
-    max_cost_per_day_usd: float = 10.00
-    max_cost_per_day_usd: float = 10.00
-    blocked_topics: List[str] = field(default_factory=lambda: [
-        "Political discussions, elections, democrats, republicans, government policy",
-        "Religious debates, theology, god, atheism",
-        "Hate speech, racism, sexism, discrimination, slurs",
-        "Medical advice, diagnosis, prescription, treatment",
-        "Legal advice, lawsuit, court case, contract interpretation",
-        "Violence, killing, physical harm, weapons, attack, death threats",
-        "Self-harm, suicide, depression, hurting oneself",
-        "Sexual content, pornography, explicit material"
-    ])
+    blocked_topics: List[str] = field(default_factory=lambda: list(_DEFAULT_BLOCKED_TOPICS))
     enable_content_guardrails: bool = True
     semantic_guardrail_threshold: float = 0.35
+    history_size: int = 1024
     
     @classmethod
     def from_file(cls, path: str) -> "PolicyConfig":
@@ -91,22 +156,10 @@ class PolicyConfig:
             json.dump(self.to_dict(), f, indent=4)
     
     def to_dict(self) -> dict:
-        return {
-            "max_tokens_per_request": self.max_tokens_per_request,
-            "max_loops_per_request": self.max_loops_per_request,
-            "max_retries": self.max_retries,
-            "timeout_seconds": self.timeout_seconds,
-            "allowed_tools": self.allowed_tools,
-            "blocked_tools": self.blocked_tools,
-            "blocked_query_patterns": self.blocked_query_patterns,
-            "rate_limit_requests_per_minute": self.rate_limit_requests_per_minute,
-            "enable_cost_limits": self.enable_cost_limits,
-            "max_cost_per_request_usd": self.max_cost_per_request_usd,
-            "max_cost_per_day_usd": self.max_cost_per_day_usd,
-            "blocked_topics": self.blocked_topics,
-            "enable_content_guardrails": self.enable_content_guardrails,
-            "semantic_guardrail_threshold": self.semantic_guardrail_threshold,
-        }
+        # Built fresh per call: the admin UI edits the policy lists in
+        # place before update_policy, so a cached view would persist and
+        # report stale values.
+        return asdict(self)
 
 
 @dataclass
@@ -117,6 +170,9 @@ class KillSwitchState:
     triggered_at: Optional[str] = None
     triggered_by: Optional[str] = None
     auto_disable_at: Optional[str] = None
+    # Parsed-once epoch twin of auto_disable_at so the is_active hot path
+    # compares floats instead of re-parsing the ISO string per call
+    auto_disable_epoch: Optional[float] = None
 
 
 class KillSwitch:
@@ -125,11 +181,14 @@ class KillSwitch:
     All state changes are logged for audit.
     """
     
-    def __init__(self):
+    def __init__(self, history_size: int = 1024):
         self._state = KillSwitchState()
-        self._lock = Lock()
+        # Readers-writer lock: is_active/get_* run on the request hot path
+        # and only read, so they should not serialize against each other
+        self._lock = RWLock()
         self._callbacks: List[Callable[[KillSwitchState], None]] = []
-        self._history: List[Dict] = []
+        # Bounded so a long-lived process can't grow audit history forever
+        self._history: deque = deque(maxlen=history_size)
     
     def enable(self, reason: str, triggered_by: str = "system",
                auto_disable_after_seconds: Optional[int] = None) -> None:
@@ -141,7 +200,7 @@ class KillSwitch:
             triggered_by: Who/what triggered it (user, system, cost_alert, etc.)
             auto_disable_after_seconds: Optional auto-disable timeout
         """
-        with self._lock:
+        with self._lock.writer():
             self._state.enabled = True
             self._state.reason = reason
             self._state.triggered_at = timestamp_now()
@@ -152,6 +211,7 @@ class KillSwitch:
                 from datetime import timedelta
                 disable_time = datetime.now(timezone.utc) + timedelta(seconds=auto_disable_after_seconds)
                 self._state.auto_disable_at = disable_time.isoformat().replace("+00:00", "Z")
+                self._state.auto_disable_epoch = disable_time.timestamp()
             
             # Log to history
             self._history.append({
@@ -160,27 +220,27 @@ class KillSwitch:
                 "reason": reason,
                 "triggered_by": triggered_by,
             })
-            
-            # Notify callbacks
-            for callback in self._callbacks:
-                callback(self._state)
-            
-            # Log to tracer if available
-            try:
-                tracer = get_tracer()
-                for trace_id in tracer.list_active_traces():
-                    tracer.add_event(
-                        trace_id=trace_id,
-                        event_type=TraceEventType.KILL_SWITCH_TRIGGERED,
-                        action=f"Kill switch enabled: {reason}",
-                        metadata={"triggered_by": triggered_by}
-                    )
-            except Exception:
-                pass  # Don't fail if tracer unavailable
+
+            # Snapshot under the lock; observers run after it's released so
+            # a slow (or re-entrant) callback can't stall is_active readers
+            callbacks = list(self._callbacks)
+            state_snapshot = copy.copy(self._state)
+
+        # Notify callbacks (lock released)
+        for callback in callbacks:
+            callback(state_snapshot)
+
+        # Broadcast to all active traces
+        _dispatch_trace_event(
+            trace_id=None,
+            event_type=TraceEventType.KILL_SWITCH_TRIGGERED,
+            action=f"Kill switch enabled: {reason}",
+            metadata={"triggered_by": triggered_by}
+        )
     
     def disable(self, disabled_by: str = "system") -> None:
         """Disable the kill switch, allowing operations to resume."""
-        with self._lock:
+        with self._lock.writer():
             if not self._state.enabled:
                 return
             
@@ -190,38 +250,42 @@ class KillSwitch:
                 "disabled_by": disabled_by,
                 "was_enabled_for": self._state.reason,
             })
-            
+
             self._state = KillSwitchState()
-            
-            for callback in self._callbacks:
-                callback(self._state)
+            callbacks = list(self._callbacks)
+            state_snapshot = copy.copy(self._state)
+
+        # Notify callbacks (lock released)
+        for callback in callbacks:
+            callback(state_snapshot)
     
     def is_active(self) -> bool:
         """Check if kill switch is currently active."""
-        with self._lock:
+        expired = False
+        with self._lock.reader():
             if not self._state.enabled:
                 return False
-            
-            # Check auto-disable
-            if self._state.auto_disable_at:
-                now = datetime.now(timezone.utc)
-                disable_at = datetime.fromisoformat(
-                    self._state.auto_disable_at.replace("Z", "+00:00")
-                )
-                if now >= disable_at:
-                    self.disable("auto_timeout")
-                    return False
-            
-            return True
-    
+
+            # Check auto-disable (epoch cached at enable() time)
+            if self._state.auto_disable_epoch is not None:
+                expired = time.time() >= self._state.auto_disable_epoch
+
+            if not expired:
+                return True
+
+        # Lock upgrade: drop the reader lock before disable() takes the
+        # writer lock; disable() re-checks state so a racing disable is safe
+        self.disable("auto_timeout")
+        return False
+
     def get_reason(self) -> Optional[str]:
         """Get the reason for kill switch activation."""
-        with self._lock:
+        with self._lock.reader():
             return self._state.reason if self._state.enabled else None
-    
+
     def get_state(self) -> Dict:
         """Get full kill switch state."""
-        with self._lock:
+        with self._lock.reader():
             return {
                 "enabled": self._state.enabled,
                 "reason": self._state.reason,
@@ -230,10 +294,10 @@ class KillSwitch:
                 "auto_disable_at": self._state.auto_disable_at,
             }
     
-    def get_history(self) -> List[Dict]:
-        """Get kill switch history."""
-        with self._lock:
-            return list(self._history)
+    def get_history(self, since: int = 0, limit: int = 100) -> List[Dict]:
+        """Get a page of kill switch history (oldest first)."""
+        with self._lock.reader():
+            return list(itertools.islice(self._history, since, since + limit))
     
     def add_callback(self, callback: Callable[[KillSwitchState], None]) -> None:
         """Add callback for kill switch state changes."""
@@ -256,11 +320,11 @@ class ModelRegistry:
     Registry for model versions with switching and rollback.
     """
     
-    def __init__(self):
+    def __init__(self, history_size: int = 1024):
         self._models: Dict[str, ModelVersion] = {}
         self._active_model_id: Optional[str] = None
-        self._history: List[Dict] = []
-        self._lock = Lock()
+        self._history: deque = deque(maxlen=history_size)
+        self._lock = RWLock()
     
     def register_model(
         self,
@@ -275,7 +339,7 @@ class ModelRegistry:
         Returns:
             Model ID
         """
-        with self._lock:
+        with self._lock.writer():
             model_id = f"{model_name}:{version}"
             
             model = ModelVersion(
@@ -315,7 +379,7 @@ class ModelRegistry:
         Returns:
             True if switch successful
         """
-        with self._lock:
+        with self._lock.writer():
             if model_id not in self._models:
                 return False
             
@@ -339,16 +403,21 @@ class ModelRegistry:
         Returns:
             True if rollback successful
         """
-        with self._lock:
+        with self._lock.reader():
             # Find the last switch in history
+            target = None
             for entry in reversed(self._history):
                 if entry["action"] == "switch" and entry["from_model"]:
-                    return self.switch_model(entry["from_model"], "rollback")
-            return False
+                    target = entry["from_model"]
+                    break
+        # switch_model takes the writer lock itself, so call it unlocked
+        if target:
+            return self.switch_model(target, "rollback")
+        return False
     
     def get_active_model(self) -> Optional[ModelVersion]:
         """Get the currently active model."""
-        with self._lock:
+        with self._lock.reader():
             if self._active_model_id:
                 return self._models.get(self._active_model_id)
             return None
@@ -360,7 +429,7 @@ class ModelRegistry:
     
     def list_models(self) -> List[Dict]:
         """List all registered models."""
-        with self._lock:
+        with self._lock.reader():
             return [
                 {
                     "model_id": m.model_id,
@@ -372,20 +441,32 @@ class ModelRegistry:
                 for m in self._models.values()
             ]
     
-    def get_history(self) -> List[Dict]:
-        """Get model registry history."""
-        with self._lock:
-            return list(self._history)
+    def get_history(self, since: int = 0, limit: int = 100) -> List[Dict]:
+        """Get a page of model registry history (oldest first)."""
+        with self._lock.reader():
+            return list(itertools.islice(self._history, since, since + limit))
+
 
+def _iso_from_epoch(ts: Optional[float]) -> Optional[str]:
+    """Format an epoch float as the platform's ISO-8601 Z timestamp."""
+    if not ts:
+        return None
+    return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat().replace("+00:00", "Z")
 
-@dataclass  
+
+@dataclass
 class AgentInfo:
-    """Information about a registered agent."""
+    """Information about a registered agent.
+
+    Timestamps are epoch floats — update_status runs on every request, and
+    time.time() is a cheap C call where ISO formatting allocates a ~30-byte
+    string; serializers format on read instead.
+    """
     agent_id: str
     name: str
     status: AgentStatus
-    registered_at: str
-    last_activity: Optional[str] = None
+    registered_at_ts: float
+    last_activity_ts: float = 0.0
     current_trace_id: Optional[str] = None
     request_count: int = 0
     error_count: int = 0
@@ -399,7 +480,10 @@ class AgentRegistry:
     
     def __init__(self):
         self._agents: Dict[str, AgentInfo] = {}
-        self._lock = Lock()
+        # Secondary index: status -> agent ids, so filtered listings and
+        # terminate_all only touch matching agents instead of scanning all
+        self._by_status: Dict[AgentStatus, set] = defaultdict(set)
+        self._lock = RWLock()
     
     def register_agent(self, name: str, metadata: Optional[Dict] = None) -> str:
         """
@@ -408,30 +492,33 @@ class AgentRegistry:
         Returns:
             Agent ID
         """
-        with self._lock:
+        with self._lock.writer():
             agent_id = f"agent_{generate_trace_id()[:8]}"
             
             agent = AgentInfo(
                 agent_id=agent_id,
                 name=name,
                 status=AgentStatus.IDLE,
-                registered_at=timestamp_now(),
+                registered_at_ts=time.time(),
                 metadata=metadata or {}
             )
             
             self._agents[agent_id] = agent
+            self._by_status[AgentStatus.IDLE].add(agent_id)
             return agent_id
     
     def update_status(self, agent_id: str, status: AgentStatus,
                       trace_id: Optional[str] = None) -> bool:
         """Update agent status."""
-        with self._lock:
+        with self._lock.writer():
             if agent_id not in self._agents:
                 return False
             
             agent = self._agents[agent_id]
+            self._by_status[agent.status].discard(agent_id)
+            self._by_status[status].add(agent_id)
             agent.status = status
-            agent.last_activity = timestamp_now()
+            agent.last_activity_ts = time.time()
             
             if trace_id:
                 agent.current_trace_id = trace_id
@@ -445,22 +532,23 @@ class AgentRegistry:
     
     def get_agent(self, agent_id: str) -> Optional[AgentInfo]:
         """Get agent info by ID."""
-        with self._lock:
+        with self._lock.reader():
             return self._agents.get(agent_id)
     
     def list_agents(self, status: Optional[AgentStatus] = None) -> List[Dict]:
         """List all agents, optionally filtered by status."""
-        with self._lock:
-            agents = self._agents.values()
+        with self._lock.reader():
             if status:
-                agents = [a for a in agents if a.status == status]
-            
+                agents = [self._agents[aid] for aid in self._by_status[status]]
+            else:
+                agents = self._agents.values()
+
             return [
                 {
                     "agent_id": a.agent_id,
                     "name": a.name,
                     "status": a.status.value,
-                    "last_activity": a.last_activity,
+                    "last_activity": _iso_from_epoch(a.last_activity_ts),
                     "request_count": a.request_count,
                     "error_count": a.error_count,
                 }
@@ -469,13 +557,16 @@ class AgentRegistry:
     
     def terminate_all(self, reason: str = "kill_switch") -> int:
         """Terminate all running agents. Returns count terminated."""
-        with self._lock:
-            count = 0
-            for agent in self._agents.values():
-                if agent.status == AgentStatus.RUNNING:
-                    agent.status = AgentStatus.TERMINATED
-                    agent.last_activity = timestamp_now()
-                    count += 1
+        with self._lock.writer():
+            running = self._by_status[AgentStatus.RUNNING]
+            count = len(running)
+            now = time.time()
+            for agent_id in running:
+                agent = self._agents[agent_id]
+                agent.status = AgentStatus.TERMINATED
+                agent.last_activity_ts = now
+            self._by_status[AgentStatus.TERMINATED] |= running
+            running.clear()
             return count
 
 
@@ -490,6 +581,20 @@ class PermissionChecker:
         self._tool_permissions: Dict[str, PermissionLevel] = {
             tool: PermissionLevel.READ for tool in policy.allowed_tools
         }
+        # Frozen sets for O(1) membership on the per-tool-call hot path;
+        # rebuilt with the checker whenever the policy changes
+        self._allowed_tools = frozenset(policy.allowed_tools)
+        self._blocked_tools = frozenset(policy.blocked_tools)
+        # Compile blocked patterns into one alternation so validate_query is
+        # a single scan instead of a per-pattern substring loop with an
+        # .upper() copy of the query. ControlPlane.update_policy rebuilds
+        # this checker, which recompiles the regex for the new policy.
+        self._blocked_query_re: Optional[re.Pattern] = None
+        if policy.blocked_query_patterns:
+            self._blocked_query_re = re.compile(
+                r"\b(?:" + "|".join(re.escape(p) for p in policy.blocked_query_patterns) + r")\b",
+                re.IGNORECASE
+            )
     
     def set_user_permission(self, user_id: str, level: PermissionLevel) -> None:
         """Set permission level for a user."""
@@ -498,11 +603,11 @@ class PermissionChecker:
     def can_execute_tool(self, tool_name: str, user_id: Optional[str] = None) -> bool:
         """Check if a tool can be executed."""
         # Check if tool is blocked
-        if tool_name in self._policy.blocked_tools:
+        if tool_name in self._blocked_tools:
             return False
-        
+
         # Check if tool is allowed
-        if tool_name not in self._policy.allowed_tools:
+        if tool_name not in self._allowed_tools:
             return False
         
         # Check user permission if specified
@@ -527,12 +632,11 @@ class PermissionChecker:
         Returns:
             Tuple of (is_valid, error_message)
         """
-        query_upper = query.upper()
-        
-        for pattern in self._policy.blocked_query_patterns:
-            if pattern.upper() in query_upper:
-                return False, f"Query contains blocked pattern: {pattern}"
-        
+        if self._blocked_query_re:
+            match = self._blocked_query_re.search(query)
+            if match:
+                return False, f"Query contains blocked pattern: {match.group(0).upper()}"
+
         return True, None
 
 
@@ -553,16 +657,42 @@ class ControlPlane:
         else:
             self._policy = PolicyConfig()
             
-        self._kill_switch = KillSwitch()
-        self._model_registry = ModelRegistry()
+        self._kill_switch = KillSwitch(history_size=self._policy.history_size)
+        self._model_registry = ModelRegistry(history_size=self._policy.history_size)
         self._agent_registry = AgentRegistry()
         self._permission_checker = PermissionChecker(self._policy)
-        self._request_timestamps: List[float] = []
+        # Sliding-window rate limit state: monotonic timestamps, oldest first.
+        # Guarded by its own small lock so the hot path doesn't contend with
+        # cost tracking and status reads on the main lock.
+        self._request_timestamps: deque = deque()
+        self._rate_lock = Lock()
+        # Cost tracking gets its own lock too: cost and rate-limit state
+        # never interact, so no path takes more than one of these
         self._daily_cost: float = 0.0
+        self._cost_lock = Lock()
         self._lock = Lock()
         
         # Analytics State
         self._safety_stats = {"allowed": 0, "blocked": 0}
+
+        # Negative cache for classifier-blocked queries: decisions are
+        # deterministic per policy version, so a repeat of a blocked query
+        # is re-rejected without re-running the pattern/topic checks.
+        # Cleared on update_policy; LRU order via OrderedDict. Like the
+        # rate limiter, it gets its own small lock: the OrderedDict is
+        # read and reordered on every request, and move_to_end racing
+        # popitem would corrupt the linked list.
+        self._blocked_cache: "OrderedDict[str, str]" = OrderedDict()
+        self._blocked_cache_lock = Lock()
+
+        # Status snapshot cache: dashboards poll get_status every few
+        # seconds and none of it needs sub-second freshness
+        self._status_cache: Optional[tuple] = None  # (monotonic_ts, status_dict)
+        self._status_ttl = 1.0
+
+        # Fast-path flags: skip the per-request validation calls entirely
+        # when the policy has nothing to check against
+        self._refresh_policy_flags()
         
         # Semantic Guardrails State
         self._embedding_model = get_embedding_model()
@@ -579,14 +709,23 @@ class ControlPlane:
         # Link kill switch to agent registry
         self._kill_switch.add_callback(self._on_kill_switch_change)
 
+    def _refresh_policy_flags(self) -> None:
+        """Recompute validation short-circuit flags from the current policy."""
+        self._has_query_patterns = bool(self._policy.blocked_query_patterns)
+        self._has_topics = bool(self._policy.blocked_topics)
+
     def update_policy(self, new_policy: PolicyConfig) -> None:
         """Update and persist the control plane policy."""
         with self._lock:
             self._policy = new_policy
             self._permission_checker = PermissionChecker(self._policy)
-            
+            self._refresh_policy_flags()
+
             # Clear embeddings cache to force reload on next check
             self._blocked_topic_embeddings = None
+            self._status_cache = None
+            with self._blocked_cache_lock:
+                self._blocked_cache.clear()
             
             # Persist to disk
             Path("config").mkdir(exist_ok=True)
@@ -595,6 +734,7 @@ class ControlPlane:
     
     def _on_kill_switch_change(self, state: KillSwitchState) -> None:
         """Handle kill switch state changes."""
+        self._status_cache = None
         if state.enabled:
             terminated = self._agent_registry.terminate_all("kill_switch")
             # Log would go here
@@ -652,7 +792,9 @@ class ControlPlane:
         
         # Check daily cost limit
         if self._policy.enable_cost_limits:
-            if self._daily_cost >= self._policy.max_cost_per_day_usd:
+            with self._cost_lock:
+                over_limit = self._daily_cost >= self._policy.max_cost_per_day_usd
+            if over_limit:
                 self._log_policy_check(trace_id, "cost_limit", False, "Daily cost limit exceeded")
                 self._increment_stat("blocked")
                 return False, "Daily cost limit exceeded"
@@ -662,21 +804,23 @@ class ControlPlane:
     
     def _check_rate_limit(self) -> bool:
         """Check if within rate limit."""
-        with self._lock:
-            now = time.time()
-            minute_ago = now - 60
-            
-            # Remove old timestamps
-            self._request_timestamps = [
-                ts for ts in self._request_timestamps if ts > minute_ago
-            ]
-            
+        # O(1) amortized: each timestamp is appended and popped exactly once.
+        # time.monotonic() avoids wall-clock jumps resetting the window.
+        now = time.monotonic()
+        cutoff = now - 60
+        dq = self._request_timestamps
+
+        with self._rate_lock:
+            # Expire timestamps that fell out of the window
+            while dq and dq[0] <= cutoff:
+                dq.popleft()
+
             # Check limit
-            if len(self._request_timestamps) >= self._policy.rate_limit_requests_per_minute:
+            if len(dq) >= self._policy.rate_limit_requests_per_minute:
                 return False
-            
+
             # Record this request
-            self._request_timestamps.append(now)
+            dq.append(now)
             return True
     
     def _log_policy_check(self, trace_id: Optional[str], check_type: str,
@@ -684,19 +828,15 @@ class ControlPlane:
         """Log a policy check to the tracer."""
         if not trace_id:
             return
-        
-        try:
-            tracer = get_tracer()
-            tracer.add_event(
-                trace_id=trace_id,
-                event_type=TraceEventType.POLICY_CHECK,
-                action=f"Policy check: {check_type}",
-                success=passed,
-                error_message=reason,
-                metadata={"check_type": check_type}
-            )
-        except Exception:
-            pass
+
+        _dispatch_trace_event(
+            trace_id=trace_id,
+            event_type=TraceEventType.POLICY_CHECK,
+            action=f"Policy check: {check_type}",
+            success=passed,
+            error_message=reason,
+            metadata={"check_type": check_type}
+        )
     
     def validate_content(self, text: str) -> tuple[bool, Optional[str]]:
         """
@@ -708,14 +848,11 @@ class ControlPlane:
             return True, None
             
         # 1. Basic Keyword Check (Fast)
-        text_lower = text.lower()
-        
-        # Check against simple keywords first (derived from topics)
-        # This is an optimization: if "politics" is in the text, block it.
-        simple_keywords = ["politics", "religion", "hate", "violence", "suicide", "sex"]
-        for kw in simple_keywords:
-            if kw in text_lower:
-                return False, f"Content blocked: violates '{kw}' policy."
+        # Single case-insensitive regex pass; the engine scans in C and we
+        # skip the .lower() copy of potentially multi-KB prompts.
+        match = _SIMPLE_KEYWORD_RE.search(text)
+        if match:
+            return False, f"Content blocked: violates '{match.group(0).lower()}' policy."
         
         # 2. Semantic Vector Check (Deep)
         try:
@@ -745,10 +882,20 @@ class ControlPlane:
             
         return True, None
 
+    BLOCKED_CACHE_SIZE = 1024
+
+    def _cache_blocked(self, query: str, reason: str) -> None:
+        """Remember a classifier rejection for cheap re-rejection."""
+        with self._blocked_cache_lock:
+            cache = self._blocked_cache
+            cache[query] = reason
+            if len(cache) > self.BLOCKED_CACHE_SIZE:
+                cache.popitem(last=False)
+
     def validate_request(self, query: str, trace_id: Optional[str] = None) -> tuple[bool, Optional[str]]:
         """
         Full validation of an incoming request.
-        
+
         Returns:
             Tuple of (is_valid, error_message)
         """
@@ -756,20 +903,35 @@ class ControlPlane:
         can_proceed, reason = self.check_can_proceed(trace_id)
         if not can_proceed:
             return False, reason
-        
-        # Validate query permission (SQL injection patterns)
-        valid_perm, perm_error = self._permission_checker.validate_query(query)
-        if not valid_perm:
-            self._log_policy_check(trace_id, "query_permission", False, perm_error)
+
+        # Negative cache first: kill switch and rate limit were checked
+        # fresh above, so a cached classifier rejection is safe to reuse
+        with self._blocked_cache_lock:
+            cached_reason = self._blocked_cache.get(query)
+            if cached_reason is not None:
+                self._blocked_cache.move_to_end(query)
+        if cached_reason is not None:
+            self._log_policy_check(trace_id, "blocked_cache", False, cached_reason)
             self._increment_stat("blocked")
-            return False, perm_error
-            
+            return False, cached_reason
+
+        # Validate query permission (SQL injection patterns)
+        if self._has_query_patterns:
+            valid_perm, perm_error = self._permission_checker.validate_query(query)
+            if not valid_perm:
+                self._cache_blocked(query, perm_error)
+                self._log_policy_check(trace_id, "query_permission", False, perm_error)
+                self._increment_stat("blocked")
+                return False, perm_error
+
         # Validate query content (Topic/Guardrails)
-        valid_content, content_error = self.validate_content(query)
-        if not valid_content:
-            self._log_policy_check(trace_id, "content_guardrail", False, content_error)
-            self._increment_stat("blocked")
-            return False, content_error
+        if self._has_topics:
+            valid_content, content_error = self.validate_content(query)
+            if not valid_content:
+                self._cache_blocked(query, content_error)
+                self._log_policy_check(trace_id, "content_guardrail", False, content_error)
+                self._increment_stat("blocked")
+                return False, content_error
         
         self._increment_stat("allowed")
         return True, None
@@ -793,7 +955,7 @@ class ControlPlane:
     
     def record_cost(self, cost_usd: float) -> None:
         """Record cost for daily tracking."""
-        with self._lock:
+        with self._cost_lock:
             self._daily_cost += cost_usd
         
         # Check if we should trigger kill switch
@@ -806,7 +968,12 @@ class ControlPlane:
     
     def get_status(self) -> Dict:
         """Get comprehensive control plane status."""
-        return {
+        now = time.monotonic()
+        cached = self._status_cache
+        if cached and now - cached[0] < self._status_ttl:
+            return cached[1]
+
+        status = {
             "timestamp": timestamp_now(),
             "kill_switch": self._kill_switch.get_state(),
             "active_model": self._model_registry.get_active_model_name(),
@@ -821,20 +988,31 @@ class ControlPlane:
                 "limit_usd": self._policy.max_cost_per_day_usd,
             }
         }
+        self._status_cache = (now, status)
+        return status
     
     def reset_daily_cost(self) -> None:
         """Reset daily cost counter (call at midnight)."""
-        with self._lock:
+        with self._cost_lock:
             self._daily_cost = 0.0
 
 
 # Singleton instance
 _control_plane: Optional[ControlPlane] = None
+_control_plane_lock = Lock()
 
 
 def get_control_plane() -> ControlPlane:
     """Get the global control plane instance."""
+    # Double-checked locking: the fast path is a single load, and the lock
+    # only matters for the first call so the constructor's side effects
+    # (model registration, callback wiring) can't run twice under a race
     global _control_plane
-    if _control_plane is None:
-        _control_plane = ControlPlane()
-    return _control_plane
+    cp = _control_plane
+    if cp is not None:
+        return cp
+
+    with _control_plane_lock:
+        if _control_plane is None:
+            _control_plane = ControlPlane()
+        return _control_plane
@@ -3,15 +3,41 @@ Feedback Manager for the Agentic Analytics Platform.
 Handles persistence of user feedback (positive/negative) to drive reinforcement learning.
 """
 
+import atexit
+import itertools
 import json
+import queue
+import threading
+from collections import deque
 from typing import List, Dict, Optional
 from pathlib import Path
 from dataclasses import dataclass, asdict
 
 from src.utils.helpers import timestamp_now
 
+# Optional fast JSON: orjson encodes dataclasses natively (no asdict deep
+# copy) and parses several times faster than the stdlib encoder
+try:
+    import orjson
+    _HAS_ORJSON = True
+except ImportError:
+    _HAS_ORJSON = False
+
 FEEDBACK_FILE = Path("data/feedback.jsonl")
 
+
+def _encode_entry(entry: "FeedbackEntry") -> bytes:
+    """Serialize a feedback entry to one JSONL line (bytes)."""
+    if _HAS_ORJSON:
+        return orjson.dumps(entry) + b"\n"
+    return (json.dumps(asdict(entry)) + "\n").encode("utf-8")
+
+
+def _decode_line(line) -> dict:
+    if _HAS_ORJSON:
+        return orjson.loads(line)
+    return json.loads(line)
+
 @dataclass
 class FeedbackEntry:
     trace_id: str
@@ -29,10 +55,82 @@ class FeedbackEntry:
 class FeedbackManager:
     """Manages recording and retrieving user feedback."""
 
+    # How much of the log tail to parse on startup; enough for hundreds of
+    # entries without ever reading the whole (potentially huge) file.
+    TAIL_BYTES = 65536
+
     def __init__(self):
         FEEDBACK_FILE.parent.mkdir(parents=True, exist_ok=True)
 
-    def record_feedback(self, trace_id: str, query: str, sql: str, rating: int, 
+        # Bounded window of recent positive (query -> SQL) pairs, kept in
+        # memory so prompt construction never re-reads the log file
+        self._recent_positive: deque = deque(maxlen=256)
+        self._version = 0
+        self._load_recent_positive()
+
+        # Persistent unbuffered append handle instead of reopening per write
+        self._fh = open(FEEDBACK_FILE, "ab", buffering=0)
+
+        # Disk writes happen on a background thread so a burst of feedback
+        # clicks never serializes request threads on disk latency; the
+        # writer drains in batches so N events collapse into one write
+        self._write_q: queue.Queue = queue.Queue(maxsize=4096)
+        self._writer = threading.Thread(target=self._writer_loop, daemon=True,
+                                        name="feedback-writer")
+        self._writer.start()
+        atexit.register(self.flush)
+
+    WRITE_BATCH = 64
+
+    def _writer_loop(self) -> None:
+        while True:
+            batch = [self._write_q.get()]
+            while len(batch) < self.WRITE_BATCH:
+                try:
+                    batch.append(self._write_q.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._fh.write(b"".join(batch))
+            except Exception:
+                pass
+            for _ in batch:
+                self._write_q.task_done()
+
+    def flush(self) -> None:
+        """Block until all queued feedback has reached the file."""
+        self._write_q.join()
+
+    def _load_recent_positive(self) -> None:
+        """Seed the in-memory window from the tail of the feedback log."""
+        if not FEEDBACK_FILE.exists():
+            return
+
+        try:
+            with open(FEEDBACK_FILE, "rb") as f:
+                f.seek(0, 2)
+                offset = max(0, f.tell() - self.TAIL_BYTES)
+                f.seek(offset)
+                lines = f.read().splitlines()
+
+            if offset > 0 and lines:
+                lines = lines[1:]  # first line may be partial
+
+            for line in lines:
+                try:
+                    data = _decode_line(line)
+                except ValueError:
+                    continue
+                # Only keep Positive feedback where SQL is present
+                if data.get("rating") == 1 and data.get("sql") and data["sql"].strip():
+                    self._recent_positive.append({
+                        "user": data["query"],
+                        "assistant": data["sql"]
+                    })
+        except Exception:
+            pass
+
+    def record_feedback(self, trace_id: str, query: str, sql: str, rating: int,
                        comment: Optional[str] = None, category: Optional[str] = None):
         """Save feedback to log file."""
         entry = FeedbackEntry(
@@ -43,49 +141,38 @@ class FeedbackManager:
             comment=comment,
             category=category
         )
-        
-        with open(FEEDBACK_FILE, "a") as f:
-            f.write(json.dumps(asdict(entry)) + "\n")
+
+        # Encode on the caller's thread, hand the bytes to the writer
+        self._write_q.put(_encode_entry(entry))
+
+        if rating == 1 and sql and sql.strip():
+            self._recent_positive.append({"user": query, "assistant": sql})
+            self._version += 1
+
+    def version(self) -> int:
+        """Monotonic version, bumped whenever the few-shot pool changes."""
+        return self._version
 
     def get_few_shot_examples(self, limit: int = 5) -> List[Dict]:
         """
         Retrieve positive examples for prompt injection (Few-Shot Learning).
-        Returns valid (Query -> SQL) pairs rated positively.
+        Returns valid (Query -> SQL) pairs rated positively, newest first.
         """
-        examples = []
-        if not FEEDBACK_FILE.exists():
-            return []
-            
-        try:
-            # Read lines in reverse to get recent examples
-            with open(FEEDBACK_FILE, "r") as f:
-                lines = f.readlines()
-                
-            for line in reversed(lines):
-                if len(examples) >= limit:
-                    break
-                
-                try:
-                    data = json.loads(line)
-                    # Only use Positive feedback where SQL is present
-                    if data["rating"] == 1 and data["sql"] and data["sql"].strip():
-                        examples.append({
-                            "user": data["query"],
-                            "assistant": data["sql"]
-                        })
-                except json.JSONDecodeError:
-                    continue
-                    
-        except Exception:
-            pass
-            
-        return examples
+        return list(itertools.islice(reversed(self._recent_positive), limit))
 
 # Singleton
 _feedback_manager = None
+_feedback_manager_lock = threading.Lock()
 
 def get_feedback_manager() -> FeedbackManager:
+    # Double-checked locking so a first-call race can't open the append
+    # handle (and seed the in-memory window) twice
     global _feedback_manager
-    if _feedback_manager is None:
-        _feedback_manager = FeedbackManager()
-    return _feedback_manager
+    mgr = _feedback_manager
+    if mgr is not None:
+        return mgr
+
+    with _feedback_manager_lock:
+        if _feedback_manager is None:
+            _feedback_manager = FeedbackManager()
+        return _feedback_manager
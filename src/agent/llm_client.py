@@ -5,18 +5,47 @@ Supports Groq Cloud API for fast inference.
 
 import os
 import json
+import asyncio
+import atexit
+import hashlib
+import logging
+import random
+import threading
 import time
-from dataclasses import dataclass
-from typing import List, Dict, Optional, Any
+from collections import OrderedDict, deque
+from dataclasses import dataclass, replace
+from typing import List, Dict, Iterator, Optional, Any
 import httpx
+import numpy as np
 
 from src.utils.config import get_settings
 from src.utils.helpers import duration_ms
 from src.observability.telemetry import get_telemetry
 from src.observability.tracing import TraceEventType
 
+logger = logging.getLogger(__name__)
 
-@dataclass
+# Optional fast JSON for the request/response hot path; stdlib fallback
+try:
+    import orjson
+    _HAS_ORJSON = True
+except ImportError:
+    _HAS_ORJSON = False
+
+
+def _json_dumps(obj: Any) -> bytes:
+    if _HAS_ORJSON:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
+
+
+def _json_loads(data: bytes) -> Any:
+    if _HAS_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+@dataclass(slots=True)
 class LLMResponse:
     """Response from LLM."""
     content: str
@@ -41,6 +70,120 @@ class LLMResponse:
         }
 
 
+# Shared AsyncClient for the batch/async paths: created lazily so importing
+# this module never opens sockets, pooled so concurrent calls reuse
+# keep-alive connections instead of paying a TLS handshake each
+_async_client: Optional[httpx.AsyncClient] = None
+
+
+def _get_async_client() -> httpx.AsyncClient:
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(
+            timeout=60.0,
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+        )
+    return _async_client
+
+
+def _close_async_client() -> None:
+    """Close the shared AsyncClient at interpreter exit (if one was built).
+
+    aclose() needs an event loop; by atexit none is running, so a short
+    asyncio.run drives the close. If somehow called with a loop already
+    running, the sockets are left to the interpreter teardown instead.
+    """
+    global _async_client
+    client = _async_client
+    _async_client = None
+    if client is None or client.is_closed:
+        return
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        asyncio.run(client.aclose())
+
+
+atexit.register(_close_async_client)
+
+
+class LLMCache:
+    """
+    Two-tier cache for chat completions.
+
+    Tier 1 is an exact LRU keyed by sha256 of (model, messages, temperature,
+    max_tokens). Tier 2 embeds the concatenated user messages and scans a
+    bounded window of recent prompts for a cosine match, so paraphrased
+    repeats of the same analytics question also skip the network round-trip.
+    Only near-deterministic requests (temperature <= 0.1) are cached, and
+    only successful responses are stored.
+    """
+
+    def __init__(self, max_entries: int = 256, semantic_threshold: float = 0.92):
+        self._exact: OrderedDict = OrderedDict()
+        self._semantic: deque = deque(maxlen=max_entries)  # (unit embedding, response)
+        self._max_entries = max_entries
+        self._threshold = semantic_threshold
+        # The cache sits on the singleton client, which batch fan-out and
+        # arun() drive from several threads; move_to_end racing popitem
+        # would corrupt the OrderedDict. Embedding calls stay outside the
+        # lock since they touch no cache state.
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict[str, str]],
+                 temperature: float, max_tokens: int) -> str:
+        blob = json.dumps(
+            {"model": model, "messages": messages,
+             "temperature": temperature, "max_tokens": max_tokens},
+            sort_keys=True
+        )
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _embed(text: str) -> Optional[np.ndarray]:
+        try:
+            from src.retrieval.embeddings import get_embedding_model
+            vec = get_embedding_model().embed_single(text)
+            norm = np.linalg.norm(vec)
+            return vec / norm if norm else None
+        except Exception:
+            return None
+
+    def get(self, key: str, user_text: str) -> Optional[LLMResponse]:
+        """Look up an exact hit, then a semantic one. Returns None on miss."""
+        with self._lock:
+            hit = self._exact.get(key)
+            if hit is not None:
+                self._exact.move_to_end(key)
+                return hit
+            has_semantic = bool(self._semantic)
+
+        if user_text and has_semantic:
+            vec = self._embed(user_text)
+            if vec is not None:
+                with self._lock:
+                    if not self._semantic:
+                        return None
+                    matrix = np.stack([emb for emb, _ in self._semantic])
+                    scores = matrix @ vec
+                    best = int(np.argmax(scores))
+                    if scores[best] >= self._threshold:
+                        return self._semantic[best][1]
+        return None
+
+    def put(self, key: str, user_text: str, response: LLMResponse) -> None:
+        vec = self._embed(user_text) if user_text else None
+        with self._lock:
+            self._exact[key] = response
+            self._exact.move_to_end(key)
+            while len(self._exact) > self._max_entries:
+                self._exact.popitem(last=False)
+
+            if vec is not None:
+                self._semantic.append((vec, response))
+
+
 class GroqClient:
     """
     Groq Cloud API client for fast LLM inference.
@@ -72,17 +215,46 @@ class GroqClient:
         
         self._model = self.MODELS.get(model, model)
         self._telemetry = get_telemetry()
+        self._cache = LLMCache()
 
-        # Debug Logging for Deployment
-        if self._api_key:
-            safe_key = f"{self._api_key[:4]}...{self._api_key[-4:]}" if len(self._api_key) > 8 else "INVALID_LEN"
-            print(f"DEBUG: Initialized GroqClient with Key: {safe_key}")
-        else:
-            print("DEBUG: GroqClient has NO API KEY set")
+        # Headers never change between calls, so build them once
+        self._base_headers = {
+            "Authorization": f"Bearer {self._api_key}",
+            "Content-Type": "application/json"
+        }
+
+        # One pooled client for the life of the instance: keep-alive
+        # connections amortize the TCP+TLS handshake to api.groq.com
+        # across calls instead of paying it on every request
+        self._http = httpx.Client(
+            timeout=httpx.Timeout(60.0, connect=5.0),
+            limits=httpx.Limits(max_keepalive_connections=16, max_connections=32),
+        )
+
+        # Debug Logging for Deployment: the key-masking f-string only runs
+        # when debug logging is actually on, and nothing hits stdout
+        if logger.isEnabledFor(logging.DEBUG):
+            if self._api_key:
+                safe_key = f"{self._api_key[:4]}...{self._api_key[-4:]}" if len(self._api_key) > 8 else "INVALID_LEN"
+                logger.debug("Initialized GroqClient with Key: %s", safe_key)
+            else:
+                logger.debug("GroqClient has NO API KEY set")
     
     def is_configured(self) -> bool:
         """Check if API key is configured."""
         return bool(self._api_key)
+
+    def set_api_key(self, api_key: str) -> None:
+        """Swap the API key in place, keeping the warm connection pool."""
+        self._api_key = api_key
+        self._base_headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
+
+    def close(self) -> None:
+        """Close the pooled HTTP client."""
+        self._http.close()
     
     def chat(
         self,
@@ -116,7 +288,20 @@ class GroqClient:
             )
         
         start_time = time.perf_counter()
-        
+
+        # Cache lookup: near-deterministic requests can reuse prior answers
+        cacheable = temperature <= 0.1
+        cache_key = None
+        user_text = ""
+        if cacheable:
+            cache_key = LLMCache.make_key(self._model, messages, temperature, max_tokens)
+            user_text = "\n".join(
+                m.get("content", "") for m in messages if m.get("role") == "user"
+            )
+            cached = self._cache.get(cache_key, user_text)
+            if cached is not None:
+                return replace(cached, duration_ms=duration_ms(start_time))
+
         # Log start
         if trace_id:
             self._telemetry.add_trace_event(
@@ -127,23 +312,21 @@ class GroqClient:
             )
         
         try:
-            headers = {
-                "Authorization": f"Bearer {self._api_key}",
-                "Content-Type": "application/json"
-            }
-            
             payload = {
                 "model": self._model,
                 "messages": messages,
                 "temperature": temperature,
                 "max_tokens": max_tokens,
             }
-            
-            with httpx.Client(timeout=60.0) as client:
-                response = client.post(self.BASE_URL, headers=headers, json=payload)
-                response.raise_for_status()
-                data = response.json()
-            
+
+            response = self._http.post(
+                self.BASE_URL,
+                headers=self._base_headers,
+                content=_json_dumps(payload)
+            )
+            response.raise_for_status()
+            data = _json_loads(response.content)
+
             elapsed = duration_ms(start_time)
             
             # Extract response
@@ -168,7 +351,7 @@ class GroqClient:
                     output_data={"tokens": usage.get("total_tokens", 0)}
                 )
             
-            return LLMResponse(
+            result = LLMResponse(
                 content=content,
                 model=self._model,
                 prompt_tokens=usage.get("prompt_tokens", 0),
@@ -177,6 +360,11 @@ class GroqClient:
                 duration_ms=elapsed,
                 success=True
             )
+
+            if cacheable:
+                self._cache.put(cache_key, user_text, result)
+
+            return result
             
         except httpx.HTTPStatusError as e:
             elapsed = duration_ms(start_time)
@@ -196,7 +384,166 @@ class GroqClient:
         except Exception as e:
             elapsed = duration_ms(start_time)
             error_msg = str(e)
-            
+
+            return LLMResponse(
+                content=f"Error: {error_msg}",
+                model=self._model,
+                prompt_tokens=0,
+                completion_tokens=0,
+                total_tokens=0,
+                duration_ms=elapsed,
+                success=False,
+                error=error_msg
+            )
+
+    def _stream_deltas(self, payload: Dict[str, Any]) -> Iterator[str]:
+        """
+        Open an SSE completion stream and yield content deltas as they
+        arrive. This is the only place that speaks the SSE wire format
+        (the "data: " framing, the [DONE] sentinel, the delta shape).
+        Protocol errors propagate to the caller as httpx exceptions.
+        """
+        with self._http.stream(
+            "POST",
+            self.BASE_URL,
+            headers=self._base_headers,
+            content=_json_dumps(payload)
+        ) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line.startswith("data: "):
+                    continue
+                data = line[6:]
+                if data == "[DONE]":
+                    break
+                try:
+                    delta = _json_loads(data.encode("utf-8"))["choices"][0]["delta"]
+                except (ValueError, KeyError, IndexError):
+                    continue
+                piece = delta.get("content")
+                if piece:
+                    yield piece
+
+    def chat_streamed(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.1,
+        max_tokens: int = 1024,
+        trace_id: Optional[str] = None,
+        on_delta=None
+    ) -> LLMResponse:
+        """
+        Chat over SSE, invoking on_delta(piece) for each content chunk as
+        it arrives, and returning the accumulated LLMResponse at the end.
+
+        This lets callers start working on the front of the response (for
+        example executing a SQL block) while the model is still emitting
+        the rest. Same caching and error shapes as chat(); Groq doesn't
+        report usage on streamed responses, so token counts are chars//4
+        estimates. Cache hits return immediately without calling on_delta.
+        """
+        if not self._api_key:
+            return LLMResponse(
+                content="Error: GROQ_API_KEY not configured. Please set the environment variable.",
+                model=self._model,
+                prompt_tokens=0,
+                completion_tokens=0,
+                total_tokens=0,
+                duration_ms=0,
+                success=False,
+                error="API key not configured"
+            )
+
+        start_time = time.perf_counter()
+
+        cacheable = temperature <= 0.1
+        cache_key = None
+        user_text = ""
+        if cacheable:
+            cache_key = LLMCache.make_key(self._model, messages, temperature, max_tokens)
+            user_text = "\n".join(
+                m.get("content", "") for m in messages if m.get("role") == "user"
+            )
+            cached = self._cache.get(cache_key, user_text)
+            if cached is not None:
+                return replace(cached, duration_ms=duration_ms(start_time))
+
+        if trace_id:
+            self._telemetry.add_trace_event(
+                trace_id=trace_id,
+                event_type=TraceEventType.LLM_CALL_START,
+                action=f"Streaming from Groq API with model {self._model}",
+                input_data={"message_count": len(messages)}
+            )
+
+        payload = {
+            "model": self._model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": True,
+        }
+
+        chunks: List[str] = []
+        try:
+            for piece in self._stream_deltas(payload):
+                chunks.append(piece)
+                if on_delta is not None:
+                    on_delta(piece)
+
+            content = "".join(chunks)
+            elapsed = duration_ms(start_time)
+
+            prompt_tokens = sum(len(m.get("content", "")) for m in messages) // 4
+            completion_tokens = len(content) // 4
+
+            if trace_id:
+                self._telemetry.add_trace_event(
+                    trace_id=trace_id,
+                    event_type=TraceEventType.LLM_CALL_END,
+                    action="Groq API stream completed",
+                    duration_ms=elapsed,
+                    output_data={"content_length": len(content)}
+                )
+
+            result = LLMResponse(
+                content=content,
+                model=self._model,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                total_tokens=prompt_tokens + completion_tokens,
+                duration_ms=elapsed,
+                success=True
+            )
+
+            if cacheable:
+                self._cache.put(cache_key, user_text, result)
+
+            return result
+
+        except httpx.HTTPStatusError as e:
+            elapsed = duration_ms(start_time)
+            try:
+                detail = e.response.read().decode("utf-8", "replace")[:200]
+            except Exception:
+                detail = ""
+            error_msg = f"HTTP {e.response.status_code}: {detail}"
+
+            return LLMResponse(
+                content=f"Error calling Groq API: {error_msg}",
+                model=self._model,
+                prompt_tokens=0,
+                completion_tokens=0,
+                total_tokens=0,
+                duration_ms=elapsed,
+                success=False,
+                error=error_msg
+            )
+
+        except Exception as e:
+            elapsed = duration_ms(start_time)
+            error_msg = str(e)
+
             return LLMResponse(
                 content=f"Error: {error_msg}",
                 model=self._model,
@@ -208,21 +555,220 @@ class GroqClient:
                 error=error_msg
             )
 
+    async def achat(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.1,
+        max_tokens: int = 1024,
+        trace_id: Optional[str] = None
+    ) -> LLMResponse:
+        """
+        Async variant of chat() on a shared pooled AsyncClient, so batch
+        workloads (dashboards, eval sweeps) overlap network latency instead
+        of serializing at hundreds of ms per question.
+        """
+        if not self._api_key:
+            return LLMResponse(
+                content="Error: GROQ_API_KEY not configured. Please set the environment variable.",
+                model=self._model,
+                prompt_tokens=0,
+                completion_tokens=0,
+                total_tokens=0,
+                duration_ms=0,
+                success=False,
+                error="API key not configured"
+            )
+
+        start_time = time.perf_counter()
+
+        cacheable = temperature <= 0.1
+        cache_key = None
+        user_text = ""
+        if cacheable:
+            cache_key = LLMCache.make_key(self._model, messages, temperature, max_tokens)
+            user_text = "\n".join(
+                m.get("content", "") for m in messages if m.get("role") == "user"
+            )
+            cached = self._cache.get(cache_key, user_text)
+            if cached is not None:
+                return replace(cached, duration_ms=duration_ms(start_time))
+
+        if trace_id:
+            self._telemetry.add_trace_event(
+                trace_id=trace_id,
+                event_type=TraceEventType.LLM_CALL_START,
+                action=f"Calling Groq API with model {self._model}",
+                input_data={"message_count": len(messages)}
+            )
+
+        try:
+            payload = {
+                "model": self._model,
+                "messages": messages,
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+            }
+
+            client = _get_async_client()
+            response = await client.post(
+                self.BASE_URL,
+                headers=self._base_headers,
+                content=_json_dumps(payload)
+            )
+            response.raise_for_status()
+            data = _json_loads(response.content)
+
+            elapsed = duration_ms(start_time)
+
+            choice = data["choices"][0]
+            content = choice["message"]["content"]
+            usage = data.get("usage", {})
+
+            if trace_id:
+                self._telemetry.track_tokens(
+                    trace_id=trace_id,
+                    model=self._model,
+                    prompt_tokens=usage.get("prompt_tokens", 0),
+                    completion_tokens=usage.get("completion_tokens", 0)
+                )
+
+                self._telemetry.add_trace_event(
+                    trace_id=trace_id,
+                    event_type=TraceEventType.LLM_CALL_END,
+                    action="Groq API call completed",
+                    duration_ms=elapsed,
+                    output_data={"tokens": usage.get("total_tokens", 0)}
+                )
+
+            result = LLMResponse(
+                content=content,
+                model=self._model,
+                prompt_tokens=usage.get("prompt_tokens", 0),
+                completion_tokens=usage.get("completion_tokens", 0),
+                total_tokens=usage.get("total_tokens", 0),
+                duration_ms=elapsed,
+                success=True
+            )
+
+            if cacheable:
+                self._cache.put(cache_key, user_text, result)
+
+            return result
+
+        except httpx.HTTPStatusError as e:
+            elapsed = duration_ms(start_time)
+            error_msg = f"HTTP {e.response.status_code}: {e.response.text[:200]}"
+
+            return LLMResponse(
+                content=f"Error calling Groq API: {error_msg}",
+                model=self._model,
+                prompt_tokens=0,
+                completion_tokens=0,
+                total_tokens=0,
+                duration_ms=elapsed,
+                success=False,
+                error=error_msg
+            )
+
+        except Exception as e:
+            elapsed = duration_ms(start_time)
+            error_msg = str(e)
+
+            return LLMResponse(
+                content=f"Error: {error_msg}",
+                model=self._model,
+                prompt_tokens=0,
+                completion_tokens=0,
+                total_tokens=0,
+                duration_ms=elapsed,
+                success=False,
+                error=error_msg
+            )
+
+    async def achat_many(
+        self,
+        batch: List[List[Dict[str, str]]],
+        temperature: float = 0.1,
+        max_tokens: int = 1024,
+        max_concurrency: int = 8,
+        max_retries: int = 3
+    ) -> List[LLMResponse]:
+        """
+        Fan out independent chat requests with bounded concurrency.
+        Retries rate-limit (429) and server (5xx) errors with exponential
+        backoff + jitter. Responses come back in input order.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def one(messages: List[Dict[str, str]]) -> LLMResponse:
+            async with semaphore:
+                for attempt in range(max_retries + 1):
+                    response = await self.achat(messages, temperature, max_tokens)
+                    if response.success or attempt == max_retries:
+                        return response
+                    err = response.error or ""
+                    if not (err.startswith("HTTP 429") or err.startswith("HTTP 5")):
+                        return response
+                    await asyncio.sleep(2 ** attempt + random.random())
+                return response
+
+        return list(await asyncio.gather(*(one(m) for m in batch)))
+
+    def chat_batch(
+        self,
+        batch: List[List[Dict[str, str]]],
+        temperature: float = 0.1,
+        max_tokens: int = 1024,
+        max_concurrency: int = 8
+    ) -> List[LLMResponse]:
+        """
+        Synchronous entry point for batch workloads: fans the requests out
+        through achat_many so N questions cost roughly one round-trip of
+        wall time instead of N. All requests in a batch share the same
+        sampling parameters, which keeps them cache-coherent. Results come
+        back in input order. Falls back to sequential chat() when called
+        from inside a running event loop (asyncio.run would raise there).
+        """
+        if not batch:
+            return []
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.achat_many(
+                batch,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                max_concurrency=max_concurrency
+            ))
+
+        return [self.chat(m, temperature, max_tokens) for m in batch]
+
 
 # Singleton instance
 _groq_client: Optional[GroqClient] = None
+_groq_client_lock = threading.Lock()
 
 
 def get_llm_client() -> GroqClient:
     """Get the global LLM client instance."""
+    # Double-checked locking so concurrent first calls can't each build a
+    # client (and its connection pool)
     global _groq_client
-    if _groq_client is None:
-        _groq_client = GroqClient()
-    return _groq_client
+    client = _groq_client
+    if client is not None:
+        return client
+
+    with _groq_client_lock:
+        if _groq_client is None:
+            _groq_client = GroqClient()
+            atexit.register(_groq_client.close)
+        return _groq_client
 
 
 def set_groq_api_key(api_key: str):
-    """Set the Groq API key and reinitialize client."""
-    global _groq_client
+    """Set the Groq API key on the shared client."""
     os.environ["GROQ_API_KEY"] = api_key
-    _groq_client = GroqClient(api_key=api_key)
+    # Mutate in place: rebuilding the client would discard its warm
+    # connection pool and response cache
+    get_llm_client().set_api_key(api_key)
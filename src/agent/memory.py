@@ -3,22 +3,34 @@ Memory module for the Agentic Analytics Platform.
 Provides short-term conversation state and context management.
 """
 
+import itertools
+import secrets
+import threading
+import time
 from dataclasses import dataclass, field
 from typing import List, Dict, Optional, Any
 from datetime import datetime, timezone
-from collections import deque
+from collections import OrderedDict, deque
 
-from src.utils.helpers import timestamp_now, generate_trace_id
+def _iso_from_ns(ns: int) -> str:
+    """Format integer epoch nanoseconds as ISO 8601 with UTC 'Z' suffix."""
+    return datetime.fromtimestamp(ns / 1e9, tz=timezone.utc).isoformat().replace("+00:00", "Z")
 
 
-@dataclass
+@dataclass(slots=True)
 class Message:
     """A single message in the conversation."""
     role: str  # "user", "assistant", "system"
     content: str
-    timestamp: str = field(default_factory=timestamp_now)
+    # Timestamps live as integer nanoseconds (8 bytes, one clock read);
+    # the ISO string is only rendered when something serializes it
+    timestamp_ns: int = field(default_factory=time.time_ns)
     metadata: Dict[str, Any] = field(default_factory=dict)
-    
+
+    @property
+    def timestamp(self) -> str:
+        return _iso_from_ns(self.timestamp_ns)
+
     def to_dict(self) -> dict:
         return {
             "role": self.role,
@@ -27,31 +39,43 @@ class Message:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class ConversationContext:
     """Context for a single conversation/session."""
     session_id: str
-    messages: List[Message] = field(default_factory=list)
-    created_at: str = field(default_factory=timestamp_now)
-    last_activity: str = field(default_factory=timestamp_now)
+    # A bounded deque caps history structurally: eviction is O(1) at the
+    # head instead of an O(N) list slice per append
+    messages: deque = field(default_factory=deque)
+    created_at_ns: int = field(default_factory=time.time_ns)
+    last_activity_ns: int = field(default_factory=time.time_ns)
     metadata: Dict[str, Any] = field(default_factory=dict)
-    
+
+    @property
+    def created_at(self) -> str:
+        return _iso_from_ns(self.created_at_ns)
+
+    @property
+    def last_activity(self) -> str:
+        return _iso_from_ns(self.last_activity_ns)
+
     def add_message(self, role: str, content: str, metadata: Dict = None) -> Message:
         """Add a message to the conversation."""
         msg = Message(role=role, content=content, metadata=metadata or {})
         self.messages.append(msg)
-        self.last_activity = timestamp_now()
+        self.last_activity_ns = msg.timestamp_ns
         return msg
     
     def get_history(self, max_messages: int = 10) -> List[Dict[str, str]]:
         """Get recent message history in LLM format."""
-        recent = self.messages[-max_messages:] if max_messages else self.messages
+        recent = self.messages
+        if max_messages and len(recent) > max_messages:
+            recent = itertools.islice(recent, len(recent) - max_messages, None)
         return [{"role": m.role, "content": m.content} for m in recent]
     
     def clear(self):
         """Clear conversation history."""
         self.messages.clear()
-        self.last_activity = timestamp_now()
+        self.last_activity_ns = time.time_ns()
 
 
 class ConversationMemory:
@@ -61,98 +85,103 @@ class ConversationMemory:
     """
     
     def __init__(self, max_history_per_session: int = 20, max_sessions: int = 100):
-        self._sessions: Dict[str, ConversationContext] = {}
+        # Insertion order doubles as LRU order: hits are moved to the end,
+        # eviction pops from the front — all O(1)
+        self._sessions: "OrderedDict[str, ConversationContext]" = OrderedDict()
         self._max_history = max_history_per_session
         self._max_sessions = max_sessions
-        self._session_order: deque = deque()  # LRU tracking
-    
+        # The singleton memory is shared across concurrent run() calls on
+        # worker threads; one lock covers the session map's LRU reordering
+        # and eviction plus the per-session history deques (iterating a
+        # deque while another thread appends raises RuntimeError).
+        self._lock = threading.Lock()
+
     def get_or_create_session(self, session_id: Optional[str] = None) -> ConversationContext:
         """Get existing session or create new one."""
         if session_id is None:
-            session_id = generate_trace_id()[:16]
-        
-        if session_id in self._sessions:
-            # Move to end of LRU
-            if session_id in self._session_order:
-                self._session_order.remove(session_id)
-            self._session_order.append(session_id)
-            return self._sessions[session_id]
-        
-        # Create new session
-        context = ConversationContext(session_id=session_id)
-        self._sessions[session_id] = context
-        self._session_order.append(session_id)
-        
-        # Enforce max sessions
-        while len(self._sessions) > self._max_sessions:
-            oldest_id = self._session_order.popleft()
-            if oldest_id in self._sessions:
-                del self._sessions[oldest_id]
-        
-        return context
-    
+            # 16 hex chars directly; no UUID formatting and slicing detour
+            session_id = secrets.token_hex(8)
+
+        with self._lock:
+            context = self._sessions.get(session_id)
+            if context is not None:
+                self._sessions.move_to_end(session_id)
+                return context
+
+            # Create new session
+            context = ConversationContext(
+                session_id=session_id,
+                messages=deque(maxlen=self._max_history)
+            )
+            self._sessions[session_id] = context
+
+            # Enforce max sessions
+            while len(self._sessions) > self._max_sessions:
+                self._sessions.popitem(last=False)
+
+            return context
+
     def add_message(self, session_id: str, role: str, content: str,
                     metadata: Dict = None) -> Message:
         """Add a message to a session."""
         context = self.get_or_create_session(session_id)
-        msg = context.add_message(role, content, metadata)
-        
-        # Enforce max history
-        if len(context.messages) > self._max_history:
-            context.messages = context.messages[-self._max_history:]
-        
-        return msg
-    
+        # History limit is enforced by the deque's maxlen
+        with self._lock:
+            return context.add_message(role, content, metadata)
+
     def get_history(self, session_id: str, max_messages: int = 10) -> List[Dict[str, str]]:
         """Get message history for a session."""
-        if session_id not in self._sessions:
-            return []
-        return self._sessions[session_id].get_history(max_messages)
-    
+        with self._lock:
+            context = self._sessions.get(session_id)
+            if context is None:
+                return []
+            return context.get_history(max_messages)
+
     def get_session(self, session_id: str) -> Optional[ConversationContext]:
         """Get a session by ID."""
-        return self._sessions.get(session_id)
-    
+        with self._lock:
+            return self._sessions.get(session_id)
+
     def clear_session(self, session_id: str) -> bool:
         """Clear a session's history."""
-        if session_id in self._sessions:
-            self._sessions[session_id].clear()
-            return True
-        return False
-    
+        with self._lock:
+            context = self._sessions.get(session_id)
+            if context is not None:
+                context.clear()
+                return True
+            return False
+
     def delete_session(self, session_id: str) -> bool:
         """Delete a session entirely."""
-        if session_id in self._sessions:
-            del self._sessions[session_id]
-            if session_id in self._session_order:
-                self._session_order.remove(session_id)
-            return True
-        return False
-    
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
     def list_sessions(self) -> List[Dict]:
         """List all active sessions."""
-        return [
-            {
-                "session_id": ctx.session_id,
-                "message_count": len(ctx.messages),
-                "created_at": ctx.created_at,
-                "last_activity": ctx.last_activity,
-            }
-            for ctx in self._sessions.values()
-        ]
-    
+        with self._lock:
+            return [
+                {
+                    "session_id": ctx.session_id,
+                    "message_count": len(ctx.messages),
+                    "created_at": ctx.created_at,
+                    "last_activity": ctx.last_activity,
+                }
+                for ctx in self._sessions.values()
+            ]
+
     def get_stats(self) -> Dict:
         """Get memory statistics."""
-        total_messages = sum(len(ctx.messages) for ctx in self._sessions.values())
-        return {
-            "active_sessions": len(self._sessions),
-            "total_messages": total_messages,
-            "max_sessions": self._max_sessions,
-            "max_history_per_session": self._max_history,
-        }
+        with self._lock:
+            total_messages = sum(len(ctx.messages) for ctx in self._sessions.values())
+            return {
+                "active_sessions": len(self._sessions),
+                "total_messages": total_messages,
+                "max_sessions": self._max_sessions,
+                "max_history_per_session": self._max_history,
+            }
 
 
-@dataclass
+@dataclass(slots=True)
 class AgentState:
     """State for a single agent execution."""
     trace_id: str
@@ -3,12 +3,31 @@ Prompt builder for the Agentic Analytics Platform.
 Constructs structured prompts with context from retrieval and metadata.
 """
 
+import functools
 from dataclasses import dataclass, field
-from typing import List, Dict, Optional, Any
+from typing import Callable, List, Dict, Optional, Any
 import json
 
 from src.retrieval.vector_store import SearchResult
 
+# Optional BPE tokenizer: accurate counts for truncation decisions; the
+# chars//4 heuristic remains the fallback when tiktoken isn't installed
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+    _HAS_TIKTOKEN = True
+except ImportError:
+    _ENCODING = None
+    _HAS_TIKTOKEN = False
+
+
+@functools.lru_cache(maxsize=8192)
+def _count_tokens(text: str) -> int:
+    """Token count for a string, cached so static content is counted once."""
+    if _HAS_TIKTOKEN:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    return len(text) // 4
+
 
 SYSTEM_PROMPT = """You are an AI analytics assistant for a sales and forecast dataset.
 
@@ -43,7 +62,7 @@ Provide your answer in this format:
 """
 
 
-@dataclass
+@dataclass(slots=True)
 class PromptContext:
     """Context for building a prompt."""
     query: str
@@ -60,15 +79,24 @@ class PromptContext:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class BuiltPrompt:
     """A built prompt ready for LLM."""
     system_prompt: str
     user_prompt: str
     messages: List[Dict[str, str]]
-    context_used: Dict[str, Any]
+    # Debug metadata is produced on demand: most builds go straight to the
+    # LLM and never look at it, so the dict isn't assembled until accessed
+    context_used_factory: Callable[[], Dict[str, Any]]
     estimated_tokens: int
-    
+    _context_used: Optional[Dict[str, Any]] = field(default=None, repr=False)
+
+    @property
+    def context_used(self) -> Dict[str, Any]:
+        if self._context_used is None:
+            self._context_used = self.context_used_factory()
+        return self._context_used
+
     def to_openai_format(self) -> List[Dict[str, str]]:
         """Convert to OpenAI messages format."""
         return self.messages
@@ -90,6 +118,25 @@ class PromptBuilder:
     
     def __init__(self, system_prompt: Optional[str] = None):
         self._system_prompt = system_prompt or SYSTEM_PROMPT
+        # Cached static prefix keyed by (semantic layer, feedback) versions;
+        # rebuilt only when either source actually changes
+        self._static_cache: tuple = (None, "", 0)
+
+    @staticmethod
+    def _source_versions() -> tuple:
+        """Current content versions of the static-prefix inputs."""
+        sl_version = fb_version = -1
+        try:
+            from src.agent.semantic_layer import get_semantic_layer
+            sl_version = get_semantic_layer().version()
+        except Exception:
+            pass
+        try:
+            from src.agent.feedback import get_feedback_manager
+            fb_version = get_feedback_manager().version()
+        except Exception:
+            pass
+        return (sl_version, fb_version)
     
     def build(self, context: PromptContext) -> BuiltPrompt:
         """
@@ -102,96 +149,138 @@ class PromptBuilder:
             BuiltPrompt ready for LLM
         """
         
-        # Enhance System Prompt with Semantic Layer & Feedback
-        final_system_prompt = self._system_prompt
-        
+        # Stable prefix first: system instructions + semantic layer +
+        # feedback examples never change within a conversation, so keeping
+        # them byte-identical at the front lets provider prompt caching
+        # skip their prefill on every turn after the first
+        final_system_prompt, examples_count = self._static_system_prompt()
+
+        # Pull chunk types out of the metadata dicts once; both the context
+        # section and context_used reuse these instead of re-fetching per chunk
+        chunk_types = [
+            c.metadata.get("chunk_type", "unknown") for c in context.retrieved_chunks
+        ]
+
+        # Per-turn retrieved context rides in its own system message so it
+        # never perturbs the cacheable prefix
+        context_section = self._build_context_section(context.retrieved_chunks, chunk_types)
+
+        # Build user prompt (just the question; context travels separately)
+        user_prompt = f"## User Question\n{context.query}"
+
+        # Enforce the context budget in one pass: walk history newest-first,
+        # keeping turns while they fit and breaking as soon as the budget is
+        # exhausted — old turns that won't make the cut are never tokenized
+        estimated_tokens = (
+            _count_tokens(final_system_prompt)
+            + _count_tokens(context_section)
+            + _count_tokens(user_prompt)
+        )
+        history_turns = len(context.conversation_history)
+        history: List[Dict[str, str]] = []
+        for msg in reversed(context.conversation_history):
+            msg_tokens = _count_tokens(msg.get("content", ""))
+            if estimated_tokens + msg_tokens > context.max_context_tokens:
+                break
+            estimated_tokens += msg_tokens
+            history.append(msg)
+        history.reverse()
+
+        # Build messages list: static prefix, dynamic context, history, query
+        messages = self._build_messages(
+            final_system_prompt,
+            context_section,
+            user_prompt,
+            history
+        )
+
+        return BuiltPrompt(
+            system_prompt=final_system_prompt,
+            user_prompt=user_prompt,
+            messages=messages,
+            context_used_factory=lambda: {
+                "chunks_count": len(chunk_types),
+                "chunk_types": chunk_types,
+                "history_turns": history_turns,
+                "feedback_examples": examples_count
+            },
+            estimated_tokens=estimated_tokens
+        )
+
+    def _static_system_prompt(self) -> tuple:
+        """
+        Assemble the static system prompt: base instructions, semantic layer
+        context, and proven few-shot examples. Returns (prompt, example_count).
+        Served from cache while the underlying sources are unchanged.
+        """
+        if self._source_versions() == self._static_cache[0]:
+            return self._static_cache[1], self._static_cache[2]
+
+        parts = [self._system_prompt]
+        examples_count = 0
+
         try:
             from src.agent.semantic_layer import get_semantic_layer
             sl_context = get_semantic_layer().get_context_block()
-            final_system_prompt += "\n\n" + sl_context
+            parts.append("\n\n" + sl_context)
         except Exception:
             pass
-            
+
         try:
             from src.agent.feedback import get_feedback_manager
             examples = get_feedback_manager().get_few_shot_examples(limit=3)
             if examples:
-                final_system_prompt += "\n\n## Proven Examples (From User Feedback)"
+                parts.append("\n\n## Proven Examples (From User Feedback)")
                 for ex in examples:
-                    final_system_prompt += f"\nQ: {ex['user']}\nSQL: {ex['assistant']}\n"
+                    parts.append(f"\nQ: {ex['user']}\nSQL: {ex['assistant']}\n")
+                examples_count = len(examples)
         except Exception:
             pass
 
-        # Build context section from retrieved chunks
-        context_section = self._build_context_section(context.retrieved_chunks)
-        
-        # Build user prompt
-        user_prompt = self._build_user_prompt(context.query, context_section)
-        
-        # Build messages list
-        messages = self._build_messages(
-            final_system_prompt,
-            user_prompt,
-            context.conversation_history
-        )
-        
-        # Estimate tokens (rough: 4 chars per token)
-        total_text = final_system_prompt + user_prompt
-        for msg in context.conversation_history:
-            total_text += msg.get("content", "")
-        estimated_tokens = len(total_text) // 4
-        
-        return BuiltPrompt(
-            system_prompt=final_system_prompt,
-            user_prompt=user_prompt,
-            messages=messages,
-            context_used={
-                "chunks_count": len(context.retrieved_chunks),
-                "chunk_types": [r.metadata.get("chunk_type") for r in context.retrieved_chunks],
-                "history_turns": len(context.conversation_history),
-                "feedback_examples": len(examples) if 'examples' in locals() else 0
-            },
-            estimated_tokens=estimated_tokens
-        )
+        prompt = "".join(parts)
+        # Key with the versions as they stand after building, since the
+        # semantic layer lazily loads (and bumps) inside get_context_block
+        self._static_cache = (self._source_versions(), prompt, examples_count)
+        return prompt, examples_count
     
-    def _build_context_section(self, chunks: List[SearchResult]) -> str:
+    def _build_context_section(self, chunks: List[SearchResult],
+                               chunk_types: Optional[List[str]] = None) -> str:
         """Build the context section from retrieved chunks."""
         if not chunks:
             return ""
-        
-        context_parts = ["## Relevant Context\n"]
-        
-        for i, chunk in enumerate(chunks, 1):
-            chunk_type = chunk.metadata.get("chunk_type", "unknown")
-            context_parts.append(f"### {chunk_type.title()} {i}")
-            context_parts.append(chunk.content)
-            context_parts.append("")  # Empty line
-        
+
+        if chunk_types is None:
+            chunk_types = [c.metadata.get("chunk_type", "unknown") for c in chunks]
+
+        # Preallocated buffer (3 slots per chunk plus the header), filled by
+        # index and joined once — no append resizes, no intermediate strings
+        context_parts = [""] * (len(chunks) * 3 + 1)
+        context_parts[0] = "## Relevant Context\n"
+
+        for i, chunk in enumerate(chunks):
+            base = i * 3 + 1
+            context_parts[base] = f"### {chunk_types[i].title()} {i + 1}"
+            context_parts[base + 1] = chunk.content
+            # base + 2 stays "" for the blank separator line
+
         return "\n".join(context_parts)
     
-    def _build_user_prompt(self, query: str, context_section: str) -> str:
-        """Build the user prompt with query and context."""
-        parts = []
-        
-        if context_section:
-            parts.append(context_section)
-            parts.append("---\n")
-        
-        parts.append(f"## User Question\n{query}")
-        
-        return "\n".join(parts)
-    
     def _build_messages(
         self,
         system_prompt: str,
+        context_section: str,
         user_prompt: str,
         history: List[Dict[str, str]]
     ) -> List[Dict[str, str]]:
-        """Build the messages list in OpenAI format."""
+        """Build the messages list in OpenAI format: the unchanging system
+        prefix first, then the per-turn retrieved context, then history."""
         messages = [
             {"role": "system", "content": system_prompt}
         ]
-        
+
+        if context_section:
+            messages.append({"role": "system", "content": context_section})
+
         # Add conversation history
         for msg in history:
             messages.append({
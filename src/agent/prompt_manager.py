@@ -3,6 +3,13 @@ import os
 from typing import Optional, Dict
 from threading import Lock
 
+# Prefer the libyaml C bindings when PyYAML was built with them; they
+# parse and emit an order of magnitude faster than the pure-Python classes
+try:
+    from yaml import CSafeLoader as _YamlLoader, CSafeDumper as _YamlDumper
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader, SafeDumper as _YamlDumper
+
 class PromptManager:
     """
     Manages loading and saving of prompts from configuration.
@@ -12,19 +19,32 @@ class PromptManager:
         self.config_path = config_path
         self._prompts: Dict[str, str] = {}
         self._lock = Lock()
+        self._mtime: Optional[float] = None
         self._load()
 
     def get_system_prompt(self) -> str:
         """Get the current analytics system prompt."""
         with self._lock:
+            self._reload_if_changed()
             return self._prompts.get("analytics_system_prompt", "System prompt not loaded.")
 
     def update_system_prompt(self, new_prompt: str) -> None:
         """Update and save the system prompt."""
         with self._lock:
+            if self._prompts.get("analytics_system_prompt") == new_prompt:
+                return  # nothing changed; skip the disk write
             self._prompts["analytics_system_prompt"] = new_prompt
             self._save()
-    
+
+    def _reload_if_changed(self):
+        """Re-read the file only when its mtime moved (e.g. edited on disk)."""
+        try:
+            mtime = os.path.getmtime(self.config_path)
+        except OSError:
+            return
+        if mtime != self._mtime:
+            self._load()
+
     def _load(self):
         """Load prompts from YAML."""
         if not os.path.exists(self.config_path):
@@ -34,15 +54,20 @@ class PromptManager:
 
         try:
             with open(self.config_path, "r") as f:
-                self._prompts = yaml.safe_load(f) or {}
+                self._prompts = yaml.load(f, Loader=_YamlLoader) or {}
+            self._mtime = os.path.getmtime(self.config_path)
         except Exception as e:
             print(f"Error loading prompts: {e}")
 
     def _save(self):
-        """Save prompts to YAML."""
+        """Save prompts to YAML via an atomic replace."""
         try:
-            with open(self.config_path, "w") as f:
-                yaml.dump(self._prompts, f, default_flow_style=False)
+            tmp_path = self.config_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                yaml.dump(self._prompts, f, Dumper=_YamlDumper, default_flow_style=False)
+            # os.replace is atomic, so readers never see a half-written file
+            os.replace(tmp_path, self.config_path)
+            self._mtime = os.path.getmtime(self.config_path)
         except Exception as e:
             print(f"Error saving prompts: {e}")
 
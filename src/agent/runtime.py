@@ -3,29 +3,237 @@ Agent runtime for the Agentic Analytics Platform.
 Core agent loop with LLM integration, SQL execution, and control plane.
 """
 
+import asyncio
+import atexit
+import functools
+import io
+import logging
+import queue
+import threading
 import time
 import re
+from time import perf_counter as _pc
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from typing import List, Dict, Optional, Any
 from enum import Enum
 
+import numpy as np
+
 from src.utils.config import get_settings
-from src.utils.helpers import generate_trace_id, duration_ms, ErrorCategory
+from src.utils.helpers import generate_trace_id, ErrorCategory
 from src.agent.control_plane import get_control_plane, ControlPlane
-from src.agent.prompt_builder import PromptBuilder, PromptContext, build_prompt
+from src.agent.prompt_builder import PromptBuilder, PromptContext, build_prompt, _count_tokens
 from src.agent.llm_client import get_llm_client, GroqClient, set_groq_api_key
 from src.agent.sql_executor import get_sql_executor, SQLExecutor, QueryResult
 from src.agent.memory import get_conversation_memory, ConversationMemory, AgentState
+from src.agent.cache import get_semantic_cache
+from src.agent.prompt_manager import get_prompt_manager
 from src.retrieval.vector_store import get_vector_store
 from src.retrieval.reranker import get_reranker
 from src.observability.telemetry import get_telemetry
 from src.observability.tracing import TraceEventType
 
+logger = logging.getLogger(__name__)
 
 
+# SQL extraction patterns, compiled once: these run on every LLM response
+_SQL_BLOCK_RE = re.compile(r"```sql\s*(.*?)\s*```", re.DOTALL | re.IGNORECASE)
+_SELECT_RE = re.compile(r"(SELECT\s+.*?(?:FROM|;).*?)(?:\n\n|$)", re.DOTALL | re.IGNORECASE)
+_SQL_STRIP_RE = re.compile(r"```sql.*?```", re.DOTALL)
 
+# Executes SQL spotted mid-stream while the model is still emitting the
+# rest of its answer; each streamed response holds at most one statement
+_SQL_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="sql-overlap")
 
-@dataclass
+# Runs the independent pre-LLM fetches (retrieval, history, system
+# prompt) concurrently instead of back to back
+_IO_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="runtime-io")
+
+
+# Keyword-driven fallback SQL: the old if/elif cascade, flattened into an
+# ordered rule table of (all-of keywords, any-of keywords, sql). Rules are
+# tried top to bottom; keywords keep their substring semantics ("category"
+# still matches "categories", "3 months" spans two words) but each keyword
+# is scanned at most once per query instead of once per branch.
+_FALLBACK_RULES = (
+    (("3 months", "product"), ("forecast", "actual"),
+     """SELECT p.product_name, SUM(f.forecast_sales) as forecast_sales
+FROM fact_sales_forecast f
+JOIN dim_date d ON f.date_id = d.date_id
+JOIN dim_product p ON f.product_id = p.product_id
+WHERE d.month IN ('January', 'February', 'March')
+GROUP BY p.product_name
+ORDER BY forecast_sales DESC
+LIMIT 10"""),
+    (("3 months", "category"), ("forecast", "actual"),
+     """SELECT p.category, SUM(f.forecast_sales) as forecast_sales
+FROM fact_sales_forecast f
+JOIN dim_date d ON f.date_id = d.date_id
+JOIN dim_product p ON f.product_id = p.product_id
+WHERE d.month IN ('January', 'February', 'March')
+GROUP BY p.category
+ORDER BY forecast_sales DESC"""),
+    (("3 months",), ("forecast", "actual"),
+     """SELECT d.month, SUM(f.forecast_sales) as forecast_sales, SUM(f.actual_sales) as actual_sales
+FROM fact_sales_forecast f
+JOIN dim_date d ON f.date_id = d.date_id
+GROUP BY d.month
+ORDER BY MIN(d.date_id)
+LIMIT 3"""),
+    (("region", "revenue"), (),
+     """SELECT s.region, SUM(f.revenue) as total_revenue
+FROM fact_sales_forecast f
+JOIN dim_store s ON f.store_id = s.store_id
+GROUP BY s.region ORDER BY total_revenue DESC"""),
+    (("category", "revenue"), (),
+     """SELECT p.category, SUM(f.revenue) as total_revenue
+FROM fact_sales_forecast f
+JOIN dim_product p ON f.product_id = p.product_id
+GROUP BY p.category ORDER BY total_revenue DESC"""),
+    (("category",), (),
+     """SELECT p.category, COUNT(*) as product_count, SUM(f.units_sold) as units_sold
+FROM fact_sales_forecast f
+JOIN dim_product p ON f.product_id = p.product_id
+GROUP BY p.category ORDER BY units_sold DESC"""),
+    (("product",), ("revenue", "sales"),
+     """SELECT p.product_name, p.category, SUM(f.revenue) as total_revenue
+FROM fact_sales_forecast f
+JOIN dim_product p ON f.product_id = p.product_id
+GROUP BY p.product_id, p.product_name, p.category ORDER BY total_revenue DESC LIMIT 10"""),
+    (("month",), ("forecast", "actual", "compare"),
+     """SELECT d.month, SUM(f.actual_sales) as actual, SUM(f.forecast_sales) as forecast
+FROM fact_sales_forecast f
+JOIN dim_date d ON f.date_id = d.date_id
+GROUP BY d.month
+ORDER BY MIN(d.date_id)"""),
+    (("quarter",), (),
+     """SELECT d.quarter, SUM(f.revenue) as total_revenue, SUM(f.units_sold) as units_sold
+FROM fact_sales_forecast f
+JOIN dim_date d ON f.date_id = d.date_id
+GROUP BY d.quarter ORDER BY d.quarter"""),
+    ((), ("margin", "profit"),
+     """SELECT
+    SUM(revenue) as total_revenue,
+    SUM(cost) as total_cost,
+    SUM(revenue) - SUM(cost) as gross_profit,
+    ROUND((SUM(revenue) - SUM(cost)) * 100.0 / SUM(revenue), 2) as gross_margin_pct
+FROM fact_sales_forecast"""),
+    (("forecast",), (),
+     """SELECT d.month, SUM(f.forecast_sales) as forecast_sales, SUM(f.actual_sales) as actual_sales
+FROM fact_sales_forecast f
+JOIN dim_date d ON f.date_id = d.date_id
+GROUP BY d.month
+ORDER BY MIN(d.date_id)"""),
+    (("store",), (),
+     """SELECT s.store_name, s.region, SUM(f.revenue) as total_revenue
+FROM fact_sales_forecast f
+JOIN dim_store s ON f.store_id = s.store_id
+GROUP BY s.store_id, s.store_name, s.region ORDER BY total_revenue DESC"""),
+    ((), ("revenue", "total"),
+     """SELECT SUM(f.revenue) as total_revenue, SUM(f.units_sold) as total_units,
+       SUM(f.revenue) - SUM(f.cost) as total_profit
+FROM fact_sales_forecast f"""),
+    (("sales",), (),
+     """SELECT d.month, SUM(f.actual_sales) as actual_sales
+FROM fact_sales_forecast f
+JOIN dim_date d ON f.date_id = d.date_id
+GROUP BY d.month
+ORDER BY MIN(d.date_id)"""),
+)
+
+# Default: revenue by region
+_FALLBACK_DEFAULT_SQL = """SELECT s.region, SUM(f.revenue) as total_revenue
+FROM fact_sales_forecast f
+JOIN dim_store s ON f.store_id = s.store_id
+GROUP BY s.region ORDER BY total_revenue DESC"""
+
+
+# Static scaffolding of the per-request user message; only the context
+# and question vary, so the surrounding text is parsed once here instead
+# of re-assembled from an f-string literal on every request
+_USER_TEMPLATE = """## Retrieved Context (with relevance scores)
+{ctx}
+
+## User Question
+{q}
+
+Generate a SQL query and provide a clear answer."""
+
+
+_RELEVANCE_LABELS = ("High", "Medium", "Low")
+
+
+def _relevance_labels(scores: List[float]) -> List[str]:
+    """
+    Bucket similarity scores into High (>0.7) / Medium (>0.4) / Low labels.
+    Small lists stay in plain Python; past 32 entries the thresholds are
+    applied vectorized so a batch re-rank doesn't pay per-chunk branching.
+    """
+    if len(scores) <= 32:
+        return ["High" if s > 0.7 else "Medium" if s > 0.4 else "Low" for s in scores]
+    arr = np.fromiter(scores, dtype=np.float32, count=len(scores))
+    buckets = np.where(arr > 0.7, 0, np.where(arr > 0.4, 1, 2))
+    return [_RELEVANCE_LABELS[b] for b in buckets]
+
+
+def _bounded_repr(rows, cols, cell_cap: int = 40, total_cap: int = 2048) -> str:
+    """
+    repr-like rendering of a row sample with hard size bounds: each cell
+    is clipped to cell_cap characters and the whole string stops near
+    total_cap, so one wide text column can't balloon the memory entry
+    (and every later prompt that carries it).
+    """
+    out = io.StringIO()
+    for i, row in enumerate(rows):
+        if i:
+            out.write("; ")
+        items = row.items() if isinstance(row, dict) else zip(cols, row)
+        out.write("{")
+        first = True
+        for key, value in items:
+            if not first:
+                out.write(", ")
+            first = False
+            cell = str(value)
+            if len(cell) > cell_cap:
+                cell = cell[:cell_cap] + "…"
+            out.write(f"{key}: {cell}")
+        out.write("}")
+        if out.tell() >= total_cap:
+            out.write(" …")
+            break
+    return out.getvalue()
+
+
+# Multi-pattern keyword scan: one alternation regex inside a zero-width
+# lookahead finds every fallback keyword in a single pass over the query
+# instead of one substring scan per keyword. The lookahead keeps matches
+# from consuming text, so overlapping hits ("sales" riding the tail of
+# "3 months", "month" inside "3 months") are all reported — exactly the
+# rule table's substring semantics. Longest-first ordering makes the
+# alternative choice deterministic; no keyword is a prefix of another.
+_FALLBACK_KEYWORDS = sorted(
+    {kw for must, any_of, _ in _FALLBACK_RULES for kw in (*must, *any_of)},
+    key=len, reverse=True
+)
+_KEYWORD_RE = re.compile("(?=(" + "|".join(re.escape(k) for k in _FALLBACK_KEYWORDS) + "))")
+
+
+@functools.lru_cache(maxsize=512)
+def _fallback_sql_for(q: str) -> str:
+    """Rule-table lookup for an already-lowercased query, memoized because
+    dashboard traffic repeats the same handful of questions."""
+    matched = set(_KEYWORD_RE.findall(q))
+
+    for must, any_of, sql in _FALLBACK_RULES:
+        if all(k in matched for k in must) and (not any_of or any(k in matched for k in any_of)):
+            return sql
+
+    return _FALLBACK_DEFAULT_SQL
+
+
+@dataclass(slots=True)
 class RetrievedContext:
     """Context chunk with similarity score."""
     content: str
@@ -52,30 +260,40 @@ class AgentResponse:
     steps: List[str] = field(default_factory=list)
     is_cached: bool = False
     
+    # Field order of the serialized dict; built once instead of a
+    # hand-written 14-entry literal per call (dataclasses.asdict would
+    # deep-copy the nested sql_result/context structures, so a flat
+    # getattr comprehension is both faster and closer to the old output)
+    _DICT_KEYS = (
+        "trace_id", "query", "answer", "sql_query", "sql_result",
+        "reasoning", "data_sources", "retrieved_context", "duration_ms",
+        "token_usage", "success", "error", "steps", "is_cached",
+    )
+
     def to_dict(self) -> dict:
-        return {
-            "trace_id": self.trace_id,
-            "query": self.query,
-            "answer": self.answer,
-            "sql_query": self.sql_query,
-            "sql_result": self.sql_result,
-            "reasoning": self.reasoning,
-            "data_sources": self.data_sources,
-            "retrieved_context": self.retrieved_context,
-            "duration_ms": round(self.duration_ms, 2),
-            "token_usage": self.token_usage,
-            "success": self.success,
-            "error": self.error,
-            "steps": self.steps,
-            "is_cached": self.is_cached
-        }
+        d = {k: getattr(self, k) for k in self._DICT_KEYS}
+        d["duration_ms"] = round(self.duration_ms, 2)
+        return d
 
 
 class AgentRuntime:
     """
     Main agent runtime with LLM and SQL integration.
     """
-    
+
+    # One long-lived instance serves every request: slots keep its
+    # attribute access on the fast path, and the _* aliases below collapse
+    # the hot self._dep.method lookups in run() to a single slot read
+    __slots__ = (
+        '_control_plane', '_llm', '_sql', '_memory', '_vector_store',
+        '_reranker', '_telemetry', '_settings', '_cache', '_prompt_manager',
+        '_telemetry_queue', '_telemetry_worker',
+        '_validate_request', '_cache_lookup', '_cache_store',
+        '_memory_history', '_memory_add', '_telem_start',
+        '_get_system_prompt', '_llm_chat_streamed', '_sql_execute',
+        '_fallback_handles',
+    )
+
     def __init__(self):
         self._control_plane = get_control_plane()
         self._llm = get_llm_client()
@@ -86,10 +304,72 @@ class AgentRuntime:
         self._telemetry = get_telemetry()
         self._settings = get_settings()
         
-        # Lazy load cache to avoid circular imports if any
-        from src.agent.cache import get_semantic_cache
         self._cache = get_semantic_cache()
-    
+
+        # Resolve the prompt manager once; per-request freshness is the
+        # manager's mtime check, not a re-import and singleton lookup
+        self._prompt_manager = get_prompt_manager()
+
+        # end_request finalizes traces and appends analytics JSONL — disk
+        # work the user shouldn't wait on. Events queue up here and a
+        # daemon thread drains them in batches, so response latency stays
+        # independent of the telemetry backend. start_request stays
+        # synchronous: trace events emitted during the request need the
+        # trace to already exist.
+        self._telemetry_queue: queue.Queue = queue.Queue()
+        self._telemetry_worker = threading.Thread(
+            target=self._drain_telemetry, daemon=True, name="runtime-telemetry"
+        )
+        self._telemetry_worker.start()
+        atexit.register(self.flush_telemetry)
+
+        # Pre-resolved bound methods for run()'s per-request call sites
+        self._validate_request = self._control_plane.validate_request
+        self._cache_lookup = self._cache.lookup_with_embedding
+        self._cache_store = self._cache.store
+        self._memory_history = self._memory.get_history
+        self._memory_add = self._memory.add_message
+        self._telem_start = self._telemetry.start_request
+        self._get_system_prompt = self._prompt_manager.get_system_prompt
+        self._llm_chat_streamed = self._llm.chat_streamed
+        self._sql_execute = self._sql.execute
+
+        # The fallback SQL set is fixed, so register each statement with
+        # DuckDB once; fallback execution then reuses the stored plan
+        # instead of re-parsing the text every time
+        self._fallback_handles: Dict[str, str] = {}
+        fallback_sqls = [sql for _, _, sql in _FALLBACK_RULES]
+        fallback_sqls.append(_FALLBACK_DEFAULT_SQL)
+        for i, sql in enumerate(fallback_sqls):
+            name = f"fallback_{i}"
+            if self._sql.prepare(name, sql):
+                self._fallback_handles[sql] = name
+
+    TELEMETRY_BATCH = 64
+
+    def _drain_telemetry(self) -> None:
+        while True:
+            batch = [self._telemetry_queue.get()]
+            while len(batch) < self.TELEMETRY_BATCH:
+                try:
+                    batch.append(self._telemetry_queue.get_nowait())
+                except queue.Empty:
+                    break
+            for kwargs in batch:
+                try:
+                    self._telemetry.end_request(**kwargs)
+                except Exception:
+                    pass
+                finally:
+                    self._telemetry_queue.task_done()
+
+    def flush_telemetry(self) -> None:
+        """Block until all queued telemetry has been forwarded."""
+        self._telemetry_queue.join()
+
+    def _end_request_async(self, **kwargs) -> None:
+        self._telemetry_queue.put(kwargs)
+
     def run(
         self,
         query: str,
@@ -106,27 +386,47 @@ class AgentRuntime:
         from src.utils.helpers import set_request_id
         set_request_id(trace_id)
         
-        start_time = time.perf_counter()
+        start_time = _pc()
         steps = []
         
         # Start telemetry
-        self._telemetry.start_request(query, trace_id, {"session_id": session_id})
+        self._telem_start(query, trace_id, {"session_id": session_id})
         
         try:
             # Step 1: Control plane check
             steps.append("🛡️ Checking Guardrails & Permissions...")
-            can_proceed, reason = self._control_plane.validate_request(query, trace_id)
+            can_proceed, reason = self._validate_request(query, trace_id)
             if not can_proceed:
                 return self._error_response(trace_id, query, start_time, f"Blocked: {reason}")
             
-            # Step 1.5: Check Semantic Cache
-            cached_data = self._cache.lookup(query)
+            # Step 1.5: Check Semantic Cache (keeping the query embedding it
+            # computed, so a miss doesn't embed the same query again below)
+            cached_data, query_embedding = self._cache_lookup(query)
+            context_chunks = retrieved_context = data_sources = None
+
+            # Evidence gate for semantic (non-exact) hits: a paraphrase can
+            # score high on cosine yet mean something else. If fresh
+            # retrieval disagrees too much with the chunks that produced
+            # the cached answer, treat it as a miss — the retrieval work is
+            # reused by the full pipeline below, so a rejected hit costs
+            # nothing extra.
+            if cached_data and cached_data["similarity_score"] < 1.0 and cached_data.get("retrieval_sig"):
+                context_chunks, retrieved_context, data_sources = self._retrieve_context_with_scores(
+                    query, trace_id, query_embedding=query_embedding
+                )
+                old_sig = set(cached_data["retrieval_sig"])
+                new_sig = {c.document_id for c in context_chunks}
+                union = old_sig | new_sig
+                if union and len(old_sig & new_sig) / len(union) < 0.7:
+                    steps.append("🔍 Cache hit failed evidence check, regenerating...")
+                    cached_data = None
+
             if cached_data:
                 steps.append(f"⚡ Semantic Cache Hit (Score: {cached_data['similarity_score']:.2f})")
-                elapsed = duration_ms(start_time)
+                elapsed = (_pc() - start_time) * 1000.0
                 
                 # Log telemetry
-                self._telemetry.end_request(trace_id=trace_id, success=True, response="CACHED_RESPONSE", username=username)
+                self._end_request_async(trace_id=trace_id, success=True, response="CACHED_RESPONSE", username=username)
                 
                 return AgentResponse(
                     trace_id=trace_id,
@@ -135,68 +435,109 @@ class AgentRuntime:
                     sql_query=cached_data['sql_query'],
                     sql_result=cached_data['sql_result'],
                     duration_ms=elapsed,
-                    token_usage={"prompt_tokens": len(query) // 4, "completion_tokens": 0},
+                    token_usage={"prompt_tokens": _count_tokens(query), "completion_tokens": 0},
                     success=True,
                     is_cached=True,
                     steps=steps
                 )
             
-            # Step 2: Retrieve context with similarity scores
+            # Steps 2-4 pull from three independent sources (vector store,
+            # conversation memory, prompt manager) — fan them out on the IO
+            # pool and join before building the messages
+            retrieval_future = None
+            if context_chunks is None:
+                retrieval_future = _IO_POOL.submit(
+                    self._retrieve_context_with_scores,
+                    query, trace_id, query_embedding=query_embedding
+                )
+            history_future = None
+            if session_id:
+                history_future = _IO_POOL.submit(
+                    self._memory_history, session_id, max_messages=4
+                )
+            prompt_future = _IO_POOL.submit(self._get_system_prompt)
+
+            # Step 2: Retrieve context with similarity scores (unless the
+            # evidence gate above already did)
             steps.append("📚 Retrieving & Reranking Semantic Context...")
-            context_chunks, retrieved_context = self._retrieve_context_with_scores(query, trace_id)
+            if retrieval_future is not None:
+                context_chunks, retrieved_context, data_sources = retrieval_future.result()
             steps.append(f"   - Found {len(context_chunks)} relevant metadata chunks")
-            
+
             # Step 3: Get conversation history
-            history = []
-            if session_id:
-                history = self._memory.get_history(session_id, max_messages=4)
-            
+            history = history_future.result() if history_future is not None else []
+
             # Step 4: Build prompt with context
             context_text = self._format_context_with_scores(context_chunks)
+
+            # Dynamic System Prompt (served from the manager's cache; it
+            # only re-reads the YAML when the file's mtime moves)
+            system_prompt = prompt_future.result()
             
-            # Dynamic System Prompt
-            from src.agent.prompt_manager import get_prompt_manager
-            system_prompt = get_prompt_manager().get_system_prompt()
-            
+            # Current query with context
+            user_message = _USER_TEMPLATE.format(ctx=context_text, q=query)
+
+            # Built in one shot: system prompt, then history, then the query
             messages = [
                 {"role": "system", "content": system_prompt},
+                *history,
+                {"role": "user", "content": user_message},
             ]
             
-            # Add history
-            for msg in history:
-                messages.append(msg)
-            
-            # Add current query with context
-            user_message = f"""## Retrieved Context (with relevance scores)
-{context_text}
-
-## User Question
-{query}
-
-Generate a SQL query and provide a clear answer."""
-            
-            messages.append({"role": "user", "content": user_message})
-            
             # Step 5: Call LLM
             if not self._llm.is_configured():
                 # Fallback to rule-based if no API key
                 answer, sql_query, sql_result = self._fallback_response(query)
             else:
                 steps.append("🧠 Thinking (Planning SQL generation)...")
-                llm_response = self._llm.chat(messages, trace_id=trace_id)
-                
+
+                # Stream the response and watch for the ```sql fence as
+                # deltas arrive: the moment the closing fence lands, the
+                # statement goes to _SQL_POOL and runs against DuckDB
+                # while the model is still emitting its prose summary.
+                # The buffer only gets re-scanned on deltas carrying a
+                # backtick, and only until the first block is found.
+                sql_state: Dict[str, Any] = {
+                    "buf": "", "query": None, "future": None, "span": None
+                }
+
+                def _watch_for_sql(piece: str) -> None:
+                    if sql_state["future"] is not None:
+                        return
+                    sql_state["buf"] += piece
+                    if "`" not in piece:
+                        return
+                    match = _SQL_BLOCK_RE.search(sql_state["buf"])
+                    if match:
+                        sql_state["query"] = match.group(1).strip()
+                        # buf is a prefix of the final answer, so the
+                        # fence span stays valid for slicing it out later
+                        sql_state["span"] = match.span()
+                        sql_state["future"] = _SQL_POOL.submit(
+                            self._execute_overlapped, sql_state["query"], query
+                        )
+
+                llm_response = self._llm_chat_streamed(
+                    messages, trace_id=trace_id, on_delta=_watch_for_sql
+                )
+
                 if not llm_response.success:
                     return self._error_response(trace_id, query, start_time, llm_response.error)
-                
+
                 answer = llm_response.content
-                
+
                 # Step 6: Extract and execute SQL if present
                 sql_query = self._extract_sql(answer)
                 sql_result = None
-                
+
                 if sql_query:
                     steps.append("⚡ Executing SQL Query...")
-                    result = self._sql.execute(sql_query)
+                    spec_fb_sql = spec_fb_result = None
+                    if sql_state["future"] is not None and sql_state["query"] == sql_query:
+                        # Already running (or done) since the fence closed
+                        result, spec_fb_sql, spec_fb_result = sql_state["future"].result()
+                    else:
+                        result = self._sql_execute(sql_query)
                     
                     # Check if result is empty or failed
                     is_empty_result = result.success and result.rows == []
@@ -204,8 +545,12 @@ Generate a SQL query and provide a clear answer."""
                     if result.success and not is_empty_result:
                         sql_result = result.to_dict()
                         
-                        # Store in Semantic Cache
-                        self._cache.store(query, sql_query, sql_result, answer)
+                        # Store in Semantic Cache, with the retrieval
+                        # evidence that backed this answer
+                        self._cache_store(
+                            query, sql_query, sql_result, answer,
+                            retrieval_sig=[c.document_id for c in context_chunks]
+                        )
                         steps.append("💾 Saved result to Semantic Cache")
                         
                     elif is_empty_result:
@@ -217,24 +562,41 @@ Generate a SQL query and provide a clear answer."""
                     else:
                         # SQL execution failed (Syntax Error) - try fallback
                         if not result.success:
-                            print(f"SQL Error: {result.error}")
+                            logger.warning("SQL error: %s", result.error)
                             steps.append(f"⚠️ SQL Error, attempting fallback...")
                             
-                        # Try a simple fallback query based on keywords
-                        fallback_sql = self._get_fallback_sql(query)
+                        # Try a simple fallback query based on keywords —
+                        # already executed inside the overlapped SQL task
+                        # when the primary failed there, otherwise run now
+                        if spec_fb_result is not None:
+                            fallback_sql, fallback_result = spec_fb_sql, spec_fb_result
+                        else:
+                            fallback_sql = self._get_fallback_sql(query)
+                            if fallback_sql:
+                                handle = self._fallback_handles.get(fallback_sql)
+                                if handle:
+                                    fallback_result = self._sql.execute_prepared(handle)
+                                else:
+                                    fallback_result = self._sql_execute(fallback_sql)
                         if fallback_sql:
-                            fallback_result = self._sql.execute(fallback_sql)
                             if fallback_result.success:
                                 sql_query = fallback_sql
                                 sql_result = fallback_result.to_dict()
                                 
-                                # Remove the failed SQL block from the answer to avoid confusion
-                                answer = re.sub(r'```sql.*?```', '', answer, flags=re.DOTALL).strip()
+                                # Remove the failed SQL block from the answer
+                                # to avoid confusion — by position when the
+                                # stream watcher already located the fence,
+                                # otherwise by regex
+                                span = sql_state["span"]
+                                if span is not None:
+                                    answer = (answer[:span[0]] + answer[span[1]:]).strip()
+                                else:
+                                    answer = _SQL_STRIP_RE.sub('', answer).strip()
                                 answer += f"\n\n*Note: Used optimized query for better results.*"
             
             # Step 7: Store in memory and inject data context
             if session_id:
-                self._memory.add_message(session_id, "user", query)
+                self._memory_add(session_id, "user", query)
                 
                 # Enhance memory with data context so LLM "sees" the results
                 memory_content = answer
@@ -242,16 +604,16 @@ Generate a SQL query and provide a clear answer."""
                     # Append a summary of the data to the assistant's memory
                     rows = sql_result['rows']
                     cols = sql_result.get('columns', [])
-                    sample = rows[:5] # Limit context size
+                    sample = _bounded_repr(rows[:5], cols)  # Limit context size
                     data_context = f"\n\n[SYSTEM_DATA_CONTEXT: The executed SQL returned {len(rows)} rows. Columns: {cols}. Sample Data: {sample}]"
                     memory_content += data_context
                 
-                self._memory.add_message(session_id, "assistant", memory_content)
+                self._memory_add(session_id, "assistant", memory_content)
             
-            elapsed = duration_ms(start_time)
+            elapsed = (_pc() - start_time) * 1000.0
             
             # End telemetry
-            self._telemetry.end_request(
+            self._end_request_async(
                 trace_id=trace_id,
                 success=True,
                 response=answer[:200],
@@ -270,7 +632,7 @@ Generate a SQL query and provide a clear answer."""
                 answer=answer,
                 sql_query=sql_query,
                 sql_result=sql_result,
-                data_sources=[c.metadata.get("chunk_type", "unknown") for c in context_chunks],
+                data_sources=data_sources,
                 retrieved_context=retrieved_context,
                 duration_ms=elapsed,
                 token_usage={
@@ -287,165 +649,115 @@ Generate a SQL query and provide a clear answer."""
         except Exception as e:
             return self._error_response(trace_id, query, start_time, str(e))
     
-    def _retrieve_context_with_scores(self, query: str, trace_id: str) -> tuple:
+    def _execute_overlapped(self, sql: str, query: str) -> tuple:
+        """
+        Run the streamed-out SQL on the pool; if it fails, chain straight
+        into the keyword fallback while the model is still emitting prose,
+        so the retry costs no extra wall-clock at join time.
+
+        Returns (result, fallback_sql, fallback_result); the fallback
+        slots are None when the primary succeeded.
+        """
+        result = self._sql_execute(sql)
+        if result.success:
+            return result, None, None
+
+        fallback_sql = self._get_fallback_sql(query)
+        if not fallback_sql:
+            return result, None, None
+
+        handle = self._fallback_handles.get(fallback_sql)
+        if handle:
+            fallback_result = self._sql.execute_prepared(handle)
+        else:
+            fallback_result = self._sql_execute(fallback_sql)
+        return result, fallback_sql, fallback_result
+
+    async def arun(
+        self,
+        query: str,
+        session_id: Optional[str] = None,
+        trace_id: Optional[str] = None,
+        username: Optional[str] = None
+    ) -> AgentResponse:
+        """
+        Async entry point for event-loop callers.
+
+        The sync pipeline already overlaps its own stages (pre-LLM fetches
+        fan out on _IO_POOL, SQL runs on _SQL_POOL while the model is
+        still streaming), so this coroutine's job is to keep the event
+        loop free: the whole request runs on a worker thread and
+        concurrent arun() calls proceed in parallel instead of stalling
+        each other on the blocking LLM roundtrip.
+        """
+        return await asyncio.to_thread(
+            self.run, query, session_id, trace_id, username
+        )
+
+    def _retrieve_context_with_scores(self, query: str, trace_id: str,
+                                      query_embedding=None) -> tuple:
         """Retrieve relevant context with similarity scores."""
-        results = self._vector_store.search(query, top_k=5, trace_id=trace_id)
+        results = self._vector_store.search(
+            query, top_k=5, trace_id=trace_id, query_embedding=query_embedding
+        )
         reranked = self._reranker.rerank(results, query=query, top_k=5)
-        
-        # Build context with scores
+
+        # Build context with scores; bind attributes once per chunk rather
+        # than reaching through the object repeatedly. data_sources rides
+        # along in the same pass so run() doesn't traverse the chunks
+        # again at response-build time.
         retrieved_context = []
-        for chunk in reranked:
+        data_sources = []
+        top = reranked[:5]
+        labels = _relevance_labels([c.score for c in top])
+        for chunk, relevance in zip(top, labels):
+            content = chunk.content
+            chunk_type = chunk.metadata.get("chunk_type", "unknown")
+            data_sources.append(chunk_type)
             retrieved_context.append({
-                "chunk_type": chunk.metadata.get("chunk_type", "unknown"),
-                "content": chunk.content[:100] + "..." if len(chunk.content) > 100 else chunk.content,
+                "chunk_type": chunk_type,
+                "content": content[:100] + "..." if len(content) > 100 else content,
                 "similarity_score": round(chunk.score, 4),
-                "relevance": "High" if chunk.score > 0.7 else "Medium" if chunk.score > 0.4 else "Low"
+                "relevance": relevance
             })
-        
-        return reranked, retrieved_context
-    
+
+        return reranked, retrieved_context, data_sources
+
     def _format_context_with_scores(self, chunks: List) -> str:
         """Format context chunks with similarity scores."""
         if not chunks:
             return "No specific context retrieved."
-        
+
+        dots = {"High": "🟢", "Medium": "🟡", "Low": "🔴"}
+        top = chunks[:3]
+        labels = _relevance_labels([c.score for c in top])
         parts = []
-        for i, chunk in enumerate(chunks[:3], 1):
+        for i, (chunk, label) in enumerate(zip(top, labels), 1):
             chunk_type = chunk.metadata.get("chunk_type", "info")
             score = chunk.score
-            relevance = "🟢 High" if score > 0.7 else "🟡 Medium" if score > 0.4 else "🔴 Low"
-            parts.append(f"**{chunk_type.title()} {i}** (Similarity: {score:.2f} - {relevance}):\n{chunk.content[:300]}")
-        
+            parts.append(f"**{chunk_type.title()} {i}** (Similarity: {score:.2f} - {dots[label]} {label}):\n{chunk.content[:300]}")
+
         return "\n\n".join(parts)
     
     def _extract_sql(self, text: str) -> Optional[str]:
         """Extract SQL query from LLM response."""
         # Look for SQL in code blocks
-        pattern = r"```sql\s*(.*?)\s*```"
-        matches = re.findall(pattern, text, re.DOTALL | re.IGNORECASE)
-        
-        if matches:
-            return matches[0].strip()
-        
+        match = _SQL_BLOCK_RE.search(text)
+        if match:
+            return match.group(1).strip()
+
         # Look for SELECT statements
-        pattern = r"(SELECT\s+.*?(?:FROM|;).*?)(?:\n\n|$)"
-        matches = re.findall(pattern, text, re.DOTALL | re.IGNORECASE)
-        
-        if matches:
-            sql = matches[0].strip()
+        match = _SELECT_RE.search(text)
+        if match:
+            sql = match.group(1).strip()
             return sql if sql.endswith(';') else sql + ';'
-        
+
         return None
     
     def _get_fallback_sql(self, query: str) -> Optional[str]:
         """Get a working fallback SQL query based on keywords."""
-        q = query.lower()
-        
-        if "3 months" in q and ("forecast" in q or "actual" in q):
-            # Check if breakdown by product/category is requested
-            if "product" in q:
-                return """SELECT p.product_name, SUM(f.forecast_sales) as forecast_sales
-FROM fact_sales_forecast f
-JOIN dim_date d ON f.date_id = d.date_id
-JOIN dim_product p ON f.product_id = p.product_id
-WHERE d.month IN ('January', 'February', 'March')
-GROUP BY p.product_name
-ORDER BY forecast_sales DESC
-LIMIT 10"""
-            elif "category" in q:
-                return """SELECT p.category, SUM(f.forecast_sales) as forecast_sales
-FROM fact_sales_forecast f
-JOIN dim_date d ON f.date_id = d.date_id
-JOIN dim_product p ON f.product_id = p.product_id
-WHERE d.month IN ('January', 'February', 'March')
-GROUP BY p.category
-ORDER BY forecast_sales DESC"""
-            
-            # Default to monthly trend
-            return """SELECT d.month, SUM(f.forecast_sales) as forecast_sales, SUM(f.actual_sales) as actual_sales
-FROM fact_sales_forecast f
-JOIN dim_date d ON f.date_id = d.date_id
-GROUP BY d.month
-ORDER BY MIN(d.date_id)
-LIMIT 3"""
-        
-        elif "region" in q and "revenue" in q:
-            return """SELECT s.region, SUM(f.revenue) as total_revenue
-FROM fact_sales_forecast f
-JOIN dim_store s ON f.store_id = s.store_id
-GROUP BY s.region ORDER BY total_revenue DESC"""
-        
-        elif "category" in q and "revenue" in q:
-            return """SELECT p.category, SUM(f.revenue) as total_revenue
-FROM fact_sales_forecast f
-JOIN dim_product p ON f.product_id = p.product_id
-GROUP BY p.category ORDER BY total_revenue DESC"""
-        
-        elif "category" in q:
-            return """SELECT p.category, COUNT(*) as product_count, SUM(f.units_sold) as units_sold
-FROM fact_sales_forecast f
-JOIN dim_product p ON f.product_id = p.product_id
-GROUP BY p.category ORDER BY units_sold DESC"""
-        
-        elif "product" in q and ("revenue" in q or "sales" in q):
-            return """SELECT p.product_name, p.category, SUM(f.revenue) as total_revenue
-FROM fact_sales_forecast f
-JOIN dim_product p ON f.product_id = p.product_id
-GROUP BY p.product_id, p.product_name, p.category ORDER BY total_revenue DESC LIMIT 10"""
-        
-        elif "month" in q and ("forecast" in q or "actual" in q or "compare" in q):
-            return """SELECT d.month, SUM(f.actual_sales) as actual, SUM(f.forecast_sales) as forecast
-FROM fact_sales_forecast f
-JOIN dim_date d ON f.date_id = d.date_id
-GROUP BY d.month
-ORDER BY MIN(d.date_id)"""
-        
-        elif "quarter" in q:
-            return """SELECT d.quarter, SUM(f.revenue) as total_revenue, SUM(f.units_sold) as units_sold
-FROM fact_sales_forecast f
-JOIN dim_date d ON f.date_id = d.date_id
-GROUP BY d.quarter ORDER BY d.quarter"""
-        
-        elif "margin" in q or "profit" in q:
-            return """SELECT 
-    SUM(revenue) as total_revenue,
-    SUM(cost) as total_cost,
-    SUM(revenue) - SUM(cost) as gross_profit,
-    ROUND((SUM(revenue) - SUM(cost)) * 100.0 / SUM(revenue), 2) as gross_margin_pct
-FROM fact_sales_forecast"""
-        
+        return _fallback_sql_for(query.lower())
 
-        elif "forecast" in q:
-            return """SELECT d.month, SUM(f.forecast_sales) as forecast_sales, SUM(f.actual_sales) as actual_sales
-FROM fact_sales_forecast f
-JOIN dim_date d ON f.date_id = d.date_id
-GROUP BY d.month
-ORDER BY MIN(d.date_id)"""
-        
-        elif "store" in q:
-            return """SELECT s.store_name, s.region, SUM(f.revenue) as total_revenue
-FROM fact_sales_forecast f
-JOIN dim_store s ON f.store_id = s.store_id
-GROUP BY s.store_id, s.store_name, s.region ORDER BY total_revenue DESC"""
-        
-        elif "revenue" in q or "total" in q:
-            return """SELECT SUM(f.revenue) as total_revenue, SUM(f.units_sold) as total_units, 
-       SUM(f.revenue) - SUM(f.cost) as total_profit
-FROM fact_sales_forecast f"""
-        
-        elif "sales" in q:
-            return """SELECT d.month, SUM(f.actual_sales) as actual_sales
-FROM fact_sales_forecast f
-JOIN dim_date d ON f.date_id = d.date_id
-GROUP BY d.month
-ORDER BY MIN(d.date_id)"""
-        
-        # Default: revenue by region
-        return """SELECT s.region, SUM(f.revenue) as total_revenue
-FROM fact_sales_forecast f
-JOIN dim_store s ON f.store_id = s.store_id
-GROUP BY s.region ORDER BY total_revenue DESC"""
-    
     def _fallback_response(self, query: str) -> tuple:
         """Generate fallback response without LLM."""
         query_lower = query.lower()
@@ -499,8 +811,8 @@ FROM fact_sales_forecast"""
     
     def _error_response(self, trace_id: str, query: str, start_time: float, error: str) -> AgentResponse:
         """Create error response."""
-        elapsed = duration_ms(start_time)
-        self._telemetry.end_request(trace_id=trace_id, success=False, error_category=ErrorCategory.RUNTIME_ERROR.value)
+        elapsed = (_pc() - start_time) * 1000.0
+        self._end_request_async(trace_id=trace_id, success=False, error_category=ErrorCategory.RUNTIME_ERROR.value)
         
         return AgentResponse(
             trace_id=trace_id,
@@ -5,12 +5,27 @@ Currently backed by metadata.json, but designed to swap for Cube.js / dbt Semant
 """
 
 import json
+import logging
+import threading
 from dataclasses import dataclass
 from typing import List, Optional, Dict
 from pathlib import Path
 
 from src.utils.config import get_settings
 
+logger = logging.getLogger(__name__)
+
+# orjson parses 2-4x faster than the stdlib; fall back silently when the
+# wheel isn't installed
+try:
+    import orjson
+
+    def _json_loads(data: bytes):
+        return orjson.loads(data)
+except ImportError:
+    def _json_loads(data: bytes):
+        return json.loads(data)
+
 @dataclass
 class MetricDefinition:
     name: str
@@ -36,15 +51,29 @@ class SemanticLayer:
         self._metrics: Dict[str, MetricDefinition] = {}
         self._dimensions: Dict[str, DimensionDefinition] = {}
         self._loaded = False
-        
+        self._load_lock = threading.Lock()
+        self._version = 0
+        self._context_block: Optional[str] = None
+
+    def version(self) -> int:
+        """Monotonic content version; bumps whenever definitions (re)load."""
+        return self._version
+
     def _load(self):
+        # Unlocked fast path; the lock only matters for the first load so
+        # concurrent requests don't parse the file twice
         if self._loaded:
             return
-            
+        with self._load_lock:
+            if self._loaded:
+                return
+            self._load_locked()
+
+    def _load_locked(self):
         try:
-            with open(self._path, 'r') as f:
-                data = json.load(f)
-                
+            with open(self._path, 'rb') as f:
+                data = _json_loads(f.read())
+
             # Parse Metrics
             for m_name, m_info in data.get("metrics", {}).items():
                 self._metrics[m_name] = MetricDefinition(
@@ -68,8 +97,9 @@ class SemanticLayer:
                         )
             
             self._loaded = True
-        except Exception as e:
-            print(f"Error loading semantic layer: {e}")
+            self._version += 1
+        except Exception:
+            logger.exception("Failed to load semantic layer from %s", self._path)
 
     def list_metrics(self) -> List[MetricDefinition]:
         self._load()
@@ -82,20 +112,29 @@ class SemanticLayer:
     def get_context_block(self) -> str:
         """Returns a consolidated business context block for the LLM."""
         self._load()
-        
-        lines = ["## Business Logic (Semantic Layer)"]
-        
-        lines.append("\n### Key Metrics")
-        for m in self._metrics.values():
-            lines.append(f"- **{m.name}**: {m.description} (Formula: `{m.formula}`)")
-            
-        return "\n".join(lines)
+
+        # Static after load: render once and hand back the same string
+        if self._context_block is None:
+            lines = ["## Business Logic (Semantic Layer)"]
+
+            lines.append("\n### Key Metrics")
+            for m in self._metrics.values():
+                lines.append(f"- **{m.name}**: {m.description} (Formula: `{m.formula}`)")
+
+            self._context_block = "\n".join(lines)
+
+        return self._context_block
 
 # Singleton
 _semantic_layer = None
+_semantic_layer_lock = threading.Lock()
 
 def get_semantic_layer() -> SemanticLayer:
     global _semantic_layer
-    if _semantic_layer is None:
-        _semantic_layer = SemanticLayer()
-    return _semantic_layer
+    layer = _semantic_layer
+    if layer is None:
+        with _semantic_layer_lock:
+            layer = _semantic_layer
+            if layer is None:
+                layer = _semantic_layer = SemanticLayer()
+    return layer
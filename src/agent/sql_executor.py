@@ -78,6 +78,7 @@ class SQLExecutor:
         self._data_dir = Path(data_dir or settings.semantic_data_dir)
         self._conn = None
         self._initialized = False
+        self._prepared: Dict[str, str] = {}
     
     def _initialize(self):
         """Initialize DuckDB connection and load data."""
@@ -157,6 +158,69 @@ class SQLExecutor:
                 error=str(e)
             )
     
+    def prepare(self, name: str, sql: str) -> bool:
+        """
+        Register a query as a named DuckDB prepared statement.
+
+        Args:
+            name: Statement name (must be a valid SQL identifier)
+            sql: The SELECT statement to prepare
+
+        Returns:
+            True if the statement was prepared successfully
+        """
+        self._initialize()
+
+        if not self._conn:
+            return False
+
+        try:
+            self._conn.execute(f"PREPARE {name} AS {sql}")
+        except Exception:
+            return False
+
+        self._prepared[name] = sql
+        return True
+
+    def execute_prepared(self, name: str) -> QueryResult:
+        """
+        Execute a statement registered with prepare().
+        DuckDB keeps the parsed plan, so repeated calls skip parse+plan.
+        """
+        sql = self._prepared.get(name)
+        if sql is None:
+            return QueryResult(
+                success=False,
+                query=name,
+                error=f"No prepared statement named '{name}'"
+            )
+
+        start_time = time.perf_counter()
+
+        try:
+            result = self._conn.execute(f"EXECUTE {name}")
+            df = result.fetchdf()
+
+            elapsed = duration_ms(start_time)
+
+            return QueryResult(
+                success=True,
+                columns=list(df.columns),
+                rows=df.values.tolist(),
+                row_count=len(df),
+                duration_ms=elapsed,
+                query=sql
+            )
+
+        except Exception as e:
+            elapsed = duration_ms(start_time)
+            return QueryResult(
+                success=False,
+                query=sql,
+                duration_ms=elapsed,
+                error=str(e)
+            )
+
     def get_schema(self) -> Dict[str, List[str]]:
         """Get schema of all tables."""
         self._initialize()
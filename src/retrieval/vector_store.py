@@ -17,7 +17,7 @@ from src.retrieval.embeddings import get_embedding_model, embed_texts
 from src.observability.latency import get_latency_tracker, OperationType
 
 
-@dataclass
+@dataclass(slots=True)
 class SearchResult:
     """A single search result."""
     document_id: str
@@ -159,27 +159,32 @@ class VectorStore:
         query: str,
         top_k: int = 5,
         trace_id: Optional[str] = None,
-        filter_metadata: Optional[Dict[str, Any]] = None
+        filter_metadata: Optional[Dict[str, Any]] = None,
+        query_embedding: Optional[np.ndarray] = None
     ) -> List[SearchResult]:
         """
         Search for similar documents.
-        
+
         Args:
             query: Search query
             top_k: Number of results to return
             trace_id: Optional trace ID
             filter_metadata: Optional metadata filter
-        
+            query_embedding: Optional precomputed query embedding; skips
+                the encoder when the caller already embedded the query
+
         Returns:
             List of SearchResult objects
         """
         if not self._documents:
             return []
-        
+
         start_time = time.perf_counter()
-        
-        # Embed query
-        query_embedding = embed_texts(query, trace_id)[0].astype(np.float32)
+
+        # Embed query (unless the caller already did)
+        if query_embedding is None:
+            query_embedding = embed_texts(query, trace_id)[0]
+        query_embedding = np.asarray(query_embedding, dtype=np.float32)
         
         if self._use_faiss:
             results = self._search_faiss(query_embedding, top_k, filter_metadata)
@@ -196,6 +201,55 @@ class VectorStore:
         
         return results
     
+    def search_batch(
+        self,
+        queries: List[str],
+        top_k: int = 5,
+        trace_id: Optional[str] = None,
+        filter_metadata: Optional[Dict[str, Any]] = None
+    ) -> List[List[SearchResult]]:
+        """
+        Search for several queries at once.
+
+        All queries go through the embedding model in a single call, so N
+        queries pay one encoder roundtrip instead of N.
+
+        Args:
+            queries: Search queries
+            top_k: Number of results per query
+            trace_id: Optional trace ID
+            filter_metadata: Optional metadata filter applied to every query
+
+        Returns:
+            One list of SearchResult objects per query, in input order
+        """
+        if not queries:
+            return []
+        if not self._documents:
+            return [[] for _ in queries]
+
+        start_time = time.perf_counter()
+
+        embeddings = embed_texts(list(queries), trace_id)
+
+        results = []
+        for embedding in embeddings:
+            embedding = np.asarray(embedding, dtype=np.float32)
+            if self._use_faiss:
+                results.append(self._search_faiss(embedding, top_k, filter_metadata))
+            else:
+                results.append(self._search_numpy(embedding, top_k, filter_metadata))
+
+        elapsed = duration_ms(start_time)
+        self._latency_tracker.record(
+            operation=OperationType.RETRIEVAL,
+            duration_ms=elapsed,
+            trace_id=trace_id,
+            metadata={"action": "search_batch", "query_count": len(queries), "top_k": top_k}
+        )
+
+        return results
+
     def _search_faiss(
         self,
         query_embedding: np.ndarray,
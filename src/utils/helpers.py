@@ -6,6 +6,8 @@ Provides trace ID generation, timestamps, error classification, and decorators.
 import uuid
 import time
 import functools
+import threading
+from contextlib import contextmanager
 from datetime import datetime, timezone
 import logging
 import sys
@@ -103,6 +105,57 @@ class PlatformError:
         return f"[{self.category.value}] {self.message}"
 
 
+class RWLock:
+    """
+    Readers-writer lock: any number of concurrent readers, exclusive writers.
+    Writers are preferred so a steady stream of readers cannot starve them.
+
+    Usage:
+        lock = RWLock()
+        with lock.reader():
+            ...  # shared read access
+        with lock.writer():
+            ...  # exclusive write access
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer_active = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def reader(self):
+        """Acquire shared read access."""
+        with self._cond:
+            while self._writer_active or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def writer(self):
+        """Acquire exclusive write access."""
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer_active or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer_active = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer_active = False
+                self._cond.notify_all()
+
+
 def generate_trace_id() -> str:
     """
     Generate a unique trace ID for request tracking.
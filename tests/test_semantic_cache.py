@@ -0,0 +1,71 @@
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add src to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+
+try:
+    import faiss
+    HAS_FAISS = True
+except ImportError:
+    HAS_FAISS = False
+
+os.environ.setdefault("GROQ_API_KEY", "test")
+
+from src.agent.cache import SemanticCache
+
+
+@unittest.skipUnless(HAS_FAISS, "faiss not installed")
+class TestIVFRecall(unittest.TestCase):
+    """The IVF-PQ index must keep cosine semantics past IVF_THRESHOLD."""
+
+    def _cache_with_table(self, n: int, dim: int) -> SemanticCache:
+        tmp = tempfile.mkdtemp()
+        cache = SemanticCache(persistence_path=os.path.join(tmp, "c.jsonl"))
+        rng = np.random.default_rng(0)
+        table = rng.standard_normal((n, dim)).astype(np.float32)
+        table /= np.linalg.norm(table, axis=1, keepdims=True)
+        cache._table = table.astype(cache.EMBEDDING_DTYPE)
+        cache._pending_rows = []
+        cache._rebuild_index()
+        return cache
+
+    def test_ivf_index_uses_inner_product(self):
+        cache = self._cache_with_table(n=12000, dim=64)
+        self.assertIsInstance(cache._index, faiss.IndexIVFPQ)
+        self.assertEqual(cache._index.metric_type, faiss.METRIC_INNER_PRODUCT)
+        self.assertTrue(cache._index.is_trained)
+        self.assertEqual(cache._index.nprobe, 8)
+
+    def test_ivf_recall_of_stored_vectors(self):
+        """Querying with a stored vector must score above the hit threshold."""
+        cache = self._cache_with_table(n=12000, dim=64)
+        table = np.asarray(cache._table, dtype=np.float32)
+
+        probes = range(0, table.shape[0], 400)
+        hits = sum(
+            1 for i in probes
+            if cache._search_best(table[i])[1] >= cache._threshold
+        )
+        total = len(probes)
+        # PQ compression loses a little; anything near-total is healthy,
+        # while the L2-metric regression scored every probe at 0.0
+        self.assertGreaterEqual(hits / total, 0.9, f"recall {hits}/{total}")
+
+    def test_ivf_rejects_unrelated_query(self):
+        cache = self._cache_with_table(n=12000, dim=64)
+        rng = np.random.default_rng(1)
+        q = rng.standard_normal(64).astype(np.float32)
+        q /= np.linalg.norm(q)
+        _, score = cache._search_best(q)
+        self.assertLess(score, cache._threshold)
+
+
+if __name__ == "__main__":
+    unittest.main()